@@ -1,13 +1,24 @@
 import os
 import discord
 from discord.ext import commands
+import aiohttp
+from yarl import URL
 import json
+import hashlib
 import asyncio
 import logging  # Import logging
+import logging.handlers
+import queue
 from discord import app_commands  # Added for error handling
 
+try:
+    import uvloop  # Optional, faster drop-in event loop (see the "speedups" extra)
+except ImportError:
+    uvloop = None
+
 # Local imports
 import utils  # Import the utils module
+from utils.serialization import json_loads, json_dumps
 
 # Setup logger for this module
 logger = logging.getLogger(__name__)
@@ -20,24 +31,32 @@ DEFAULT_CONFIG = {
     "wearer_id": None,
     "max_pump_duration": 60,
     "max_session_time": 1800,
-    "max_session_extension": 3600
+    "max_session_extension": 3600,
+    "max_banked_time": 3600,
+    "default_session_time": 1800,
+    "default_pump_duration": 30,
+    "session_fsync": False,
+    "session_file": None,
+    "dev_guild_id": None
 }
 
+COMMAND_HASH_FILE = '.command_tree_hash'  # Hash of the last globally synced command tree
+
 if not os.path.exists('bot.json'):
     with open('bot.json', 'w') as f:
         json.dump(DEFAULT_CONFIG, f, indent=4)
     print("Created default bot.json. Please configure it and restart the bot.")
     exit()  # Exit if config was just created
 
-# Load configuration from JSON file
-with open('bot.json', 'r') as config_file:
-    config = json.load(config_file)
+# Load configuration from JSON file, filling in defaults for any missing keys
+with open('bot.json', 'rb') as config_file:
+    config = DEFAULT_CONFIG | json_loads(config_file.read())
 
 # Validate critical configurations
-if config.get('discord_token') == 'changeme' or not config.get('discord_token'):
+if config['discord_token'] == 'changeme' or not config['discord_token']:
     raise ValueError("Discord token is not set in bot.json. Please add it and restart.")
 
-if config.get('wearer_secret') == 'changeme':
+if config['wearer_secret'] == 'changeme':
     print(
         "\n\nSecurity Warning: Default wearer secret detected!\n"
         "Please edit bot.json and change 'wearer_secret' to a secure password.\n"
@@ -45,10 +64,19 @@ if config.get('wearer_secret') == 'changeme':
     )
     # Allow bot to run but warn user
 
+# Parse the API base URL once; every API request path is resolved against it
+API_BASE_URL = URL(config['api_base_url'])
+if not API_BASE_URL.absolute or API_BASE_URL.scheme not in ('http', 'https'):
+    raise ValueError("api_base_url in bot.json must be in the format http://[IP]:[PORT]. Please fix it and restart.")
+if API_BASE_URL.path not in ('', '/'):
+    print(f"Warning: Ignoring path '{API_BASE_URL.path}' in api_base_url; the lBIS API is served from the device root.")
+API_BASE_URL = API_BASE_URL.origin()
+
 # --- Bot Setup ---
-intents = discord.Intents.default()
-intents.message_content = True  # Keep if needed for prefix commands, otherwise can be false for slash commands only
-# Consider discord.Intents.none() if only slash commands and no message content needed
+# Slash commands only: subscribe to the bare minimum so the gateway doesn't stream every message to us
+intents = discord.Intents.none()
+intents.guilds = True  # Guild/channel cache, used for command locations in wearer notifications
+intents.dm_messages = True  # /admin wearer is DM-only
 
 
 class lBISBot(commands.Bot):
@@ -56,8 +84,14 @@ class lBISBot(commands.Bot):
         super().__init__(*args, **kwargs)
         # Attach config and API URL directly to bot instance for easy access in cogs
         self.config = config
-        self.API_BASE_URL = config.get('api_base_url', 'http://localhost:80')
-        self.OWNER_ID = config.get("wearer_id", None)  # Load initial Owner/Wearer ID
+        self.API_BASE_URL = str(API_BASE_URL)
+        self.OWNER_ID = config["wearer_id"]  # Load initial Owner/Wearer ID
+        # Settings read by commands on every use, resolved once
+        self.max_banked_time = int(config["max_banked_time"])
+        self.max_pump_duration = int(config["max_pump_duration"])
+        self.default_pump_duration = int(config["default_pump_duration"])
+        self.max_session_time = int(config["max_session_time"])
+        self.wearer_secret: str = config["wearer_secret"]
 
         # Initialize state variables on the bot object
         self.latch_active = False
@@ -66,50 +100,120 @@ class lBISBot(commands.Bot):
         self.latch_reason = None
         self.session_time_remaining = 0
         self.session_pump_start = None
+        self.session_debit_start: float | None = None  # Monotonic time session debit was last settled for a manually run pump
+        self.session_expiry_handle: asyncio.TimerHandle | None = None  # Fires when that debit reaches zero
         self.service_was_up = True  # Assume service is up initially
         self.ready_note = None  # Initialize ready_note
         self.banked_time: int = 0  # Added: Banked time in seconds
         self.pump_task: asyncio.Task | None = None  # Added: Reference to the running pump task
+        self.pump_active: bool = False  # True from the moment a pump task is started until it has finished
+        self.pump_stopping: bool = False  # True while a finished pump task turns the pump off and saves
+        self.banked_run_start: float | None = None  # Event loop time the running banked pump started; it's charged when it ends
         self.pump_task_end_time: float | None = None  # Added: Target end time for the pump task
         self.pump_intensity: float = 1.0  # Added: Current pump intensity (0.0 to 1.0)
+        self.pump_interrupt_event = asyncio.Event()  # Set when a running pump task may need to stop (latch, service down)
+        self.last_pump_time: float | None = None  # Event loop (monotonic) time the pump was last switched; None if never run
+        self.current_pump_state: float | None = None  # Last known pump duty cycle, see utils.record_pump_state
+        self.pump_state_updated: float = 0.0  # Monotonic time current_pump_state was recorded
+        self._pump_state_probe: asyncio.Task | None = None  # getPumpState request in flight, see utils.get_api_pump_state
+        self.device_base_url = self.API_BASE_URL  # Device API URL used by the monitoring helpers
+        self.state_manager = None  # Created by load_session_state below
+        self._state_dirty = False  # Unsaved state changes, see utils.mark_session_dirty
+        self._state_flush_handle: asyncio.TimerHandle | None = None  # Pending debounced save
+        self._state_flush_task: asyncio.Task | None = None  # Debounced save in progress
+        self.http_session: aiohttp.ClientSession | None = None  # Shared HTTP session for the lBIS API, created in setup_hook
+        self.status_dirty = asyncio.Event()  # Set when the presence needs refreshing; consumed by MonitorCog
+        self._shutdown_event = asyncio.Event()  # Set in close() so long waits can end early
+        self.wearer_outbox: asyncio.Queue[str] = asyncio.Queue(maxsize=256)  # Pending wearer DMs; drained by MonitorCog
+        self._wearer_user: discord.User | None = None  # Cached wearer, see utils.get_wearer
+        self._api_cache: dict[str, tuple[float, dict | None]] = {}  # endpoint -> (monotonic time, result), see utils.cached_api
 
         # Load persistent state
         utils.load_session_state(self)  # Pass self (the bot instance)
 
-    async def request_status_update(self):
-        """Requests the MonitorCog to update the bot's presence."""
-        monitor_cog = self.get_cog('MonitorCog')
-        if monitor_cog:
-            # Use create_task to avoid blocking if the update takes time
-            asyncio.create_task(monitor_cog.update_bot_status())
+    def request_status_update(self):
+        """Requests the MonitorCog to update the bot's presence.
+
+        This only flags the presence as stale; MonitorCog's status task applies it, so a
+        burst of requests coalesces into a single presence update.
+        """
+        if self.get_cog('MonitorCog'):
+            self.status_dirty.set()
         else:
             # Log if the cog isn't loaded for some reason
             logging.warning("Tried to request status update, but MonitorCog is not loaded.")
 
     async def setup_hook(self):
-        # Load Cogs
+        # Create one pooled, keep-alive session for every request to the lBIS API
+        self.http_session = aiohttp.ClientSession(
+            base_url=self.API_BASE_URL,
+            connector=aiohttp.TCPConnector(limit=32, keepalive_timeout=75, ttl_dns_cache=300),
+            timeout=utils.HTTP_TIMEOUT,
+            json_serialize=json_dumps
+        )
+
+        # Load Cogs concurrently
         cogs_dir = "cogs"
-        for filename in os.listdir(cogs_dir):
-            # Skip core.py as its functionality has been moved
-            if filename == "core.py":
-                continue
-            if filename.endswith(".py") and not filename.startswith("_"):
-                try:
-                    await self.load_extension(f"{cogs_dir}.{filename[:-3]}")
-                    print(f"Loaded cog: {filename[:-3]}")
-                except Exception as e:
-                    print(f"Failed to load cog {filename[:-3]}: {e}")
+        with os.scandir(cogs_dir) as entries:
+            extensions = [
+                f"{cogs_dir}.{entry.name[:-3]}"
+                for entry in entries
+                # Skip core.py as its functionality has been moved
+                if entry.is_file() and entry.name.endswith(".py") and not entry.name.startswith("_") and entry.name != "core.py"
+            ]
+        results = await asyncio.gather(*(self.load_extension(ext) for ext in extensions), return_exceptions=True)
+        for ext, result in zip(extensions, results):
+            name = ext.rsplit(".", 1)[-1]
+            if isinstance(result, BaseException):
+                print(f"Failed to load cog {name}: {result}")
+            else:
+                print(f"Loaded cog: {name}")
 
         # Sync commands after loading cogs
         try:
-            synced = await self.tree.sync()
-            print(f"Synced {len(synced)} command(s)")
+            await self.sync_commands()
         except Exception as e:
             print(f"Failed to sync commands: {e}")
 
         # Add the global error handler AFTER loading cogs
         self.tree.on_error = self.on_app_command_error
 
+    async def sync_commands(self):
+        """Syncs the command tree, skipping the slow global sync when nothing has changed."""
+        dev_guild_id = self.config['dev_guild_id']
+        if dev_guild_id:
+            # Guild-scoped commands propagate instantly, which is what you want while developing
+            guild = discord.Object(id=dev_guild_id)
+            self.tree.copy_global_to(guild=guild)
+            synced = await self.tree.sync(guild=guild)
+            print(f"Synced {len(synced)} command(s) to guild {dev_guild_id}")
+            return
+
+        payload = [command.to_dict(self.tree) for command in self.tree.get_commands()]
+        tree_hash = hashlib.sha256(json.dumps(payload, sort_keys=True).encode()).hexdigest()
+        try:
+            with open(COMMAND_HASH_FILE, 'r') as f:
+                if f.read().strip() == tree_hash:
+                    print("Commands unchanged since last sync, skipping global sync")
+                    return
+        except OSError:
+            pass  # No previous sync recorded
+
+        synced = await self.tree.sync()
+        print(f"Synced {len(synced)} command(s)")
+        with open(COMMAND_HASH_FILE, 'w') as f:
+            f.write(tree_hash)
+
+    async def close(self):
+        # Wake anything waiting out a timer (e.g. auto_unlatch) so shutdown isn't held up
+        self._shutdown_event.set()
+        # Unload cogs (and let their cleanup talk to the API) before closing the shared session
+        await super().close()
+        # Write out any debounced state change, and make sure the final state is on disk
+        utils.save_session_state(self)
+        if self.http_session and not self.http_session.closed:
+            await self.http_session.close()
+
     async def on_ready(self):
         print(f'{self.user} has connected to Discord!')
         # Initial status update is handled by the MonitorCog's loop starting
@@ -158,17 +262,38 @@ def start():
     # logging.basicConfig(level=logging.INFO) # Basic logging
     # discord.utils.setup_logging(level=logging.INFO) # Discord specific logging
 
-    bot = lBISBot(command_prefix='!', intents=intents)  # Prefix needed for commands.Bot, even if only using slash commands
+    bot = lBISBot(command_prefix='!', intents=intents, chunk_guilds_at_startup=False)  # Prefix needed for commands.Bot, even if only using slash commands
 
-    bot_token = config.get('discord_token')
+    bot_token = config['discord_token']
     # Validation already happened above
 
+    async def runner():
+        async with bot:
+            await bot.start(bot_token)
+
+    # bot.run() would normally set up discord.py's logging for us
+    discord.utils.setup_logging()
+    # Hand log records to a background thread so stream writes never block the event loop
+    root_logger = logging.getLogger()
+    log_queue = queue.SimpleQueue()
+    log_listener = logging.handlers.QueueListener(log_queue, *root_logger.handlers, respect_handler_level=True)
+    root_logger.handlers = [logging.handlers.QueueHandler(log_queue)]
+    log_listener.start()
+
+    # Use uvloop when it's installed; the same loop is used for startup and bot.close()
+    loop_factory = uvloop.new_event_loop if uvloop is not None else None
+
     try:
-        bot.run(bot_token)
+        with asyncio.Runner(loop_factory=loop_factory) as loop_runner:
+            loop_runner.run(runner())
+    except KeyboardInterrupt:
+        pass  # Runner cancels remaining tasks and closes the loop
     except discord.errors.LoginFailure:
         print("Failed to log in. Please check your Discord token in bot.json.")
     except Exception as e:
         print(f"An error occurred while running the bot: {e}")
+    finally:
+        log_listener.stop()  # Flush whatever is still queued
 # --- Main Execution ---
 
 if __name__ == "__main__":
@@ -3,18 +3,21 @@ from discord.ext import commands
 from discord import app_commands
 import aiohttp
 import asyncio
+import hmac
 import logging
 import sys  # Import sys for restart
 import os  # Import os for restart
 
 from utils import (
-    is_wearer, dm_wearer_on_use, save_wearer_id, save_session_state,
-    auto_unlatch, update_session_time, format_time, check_is_wearer,
-    api_request, check_is_privileged  # Added imports
+    is_wearer, dm_wearer_on_use, save_wearer_id, save_session_state_async, mark_session_dirty,
+    auto_unlatch, update_session_time, add_banked_time, notify_budget_changed, format_time, check_is_wearer,
+    check_is_privileged, marco_probe, build_status_embed  # Added imports
 )
 
 logger = logging.getLogger(__name__)
 
+INTERACTION_TIMEOUT = 2.5  # Discord wants a response within 3s, so don't wait on the device any longer
+
 # --- Admin Command Group (Moved from core.py) --- #
 
 class AdminGroup(app_commands.Group):
@@ -26,13 +29,12 @@ class AdminGroup(app_commands.Group):
     async def marco(self, interaction: discord.Interaction):
         """Check if the API server is responding"""
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.get(f"{self.bot.API_BASE_URL}/api/marco", timeout=5) as response:
-                    if response.status == 200:
-                        data = await response.text()
-                        await interaction.response.send_message(f"Server says: {data}", ephemeral=True)
-                    else:
-                        await interaction.response.send_message(f"Server responded with status {response.status}", ephemeral=True)
+            async with asyncio.timeout(INTERACTION_TIMEOUT):
+                status, data = await marco_probe(self.bot)
+            if status == 200:
+                await interaction.response.send_message(f"Server says: {data}", ephemeral=True)
+            else:
+                await interaction.response.send_message(f"Server responded with status {status}", ephemeral=True)
         except asyncio.TimeoutError:
             await interaction.response.send_message("Failed to reach server: Request timed out.", ephemeral=True)
         except aiohttp.ClientConnectorError:
@@ -43,60 +45,12 @@ class AdminGroup(app_commands.Group):
     @app_commands.command(name="status", description="Shows the current status of the bot and session.")
     async def status(self, interaction: discord.Interaction):
         """Displays the current status."""
-        # Check service reachability first
-        api_status = "Unknown"
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.get(f"{self.bot.API_BASE_URL}/api/getPumpState", timeout=5) as response:
-                    if response.status == 200:
-                        api_status = "Reachable"
-                    else:
-                        api_status = f"Error ({response.status})"
-        except Exception:
-            api_status = "Unreachable"  # Service likely down
-
-        # Session Info
-        session_time_str = format_time(self.bot.session_time_remaining)
-        banked_time_str = format_time(self.bot.banked_time)
-        latch_status = "Latched" if self.bot.latch_active else "Unlatched"
-        latch_reason_str = f" ({self.bot.latch_reason})" if self.bot.latch_reason else ""
-        latch_status += latch_reason_str
-        pump_status = "Unknown"
-
-        if self.bot.last_pump_time:
-            # Check if a pump task is running
-            if self.bot.pump_task and not self.bot.pump_task.done():
-                pump_status = "ON (Timed/Banked)"
-            else:
-                # Check API for actual pump state if no task is running
-                pump_state = await api_request(self.bot, "getPumpState")
-                if pump_state is not None:
-                    try:
-                        # Handle both text ("0"/"1") and JSON responses
-                        if isinstance(pump_state, dict):
-                            pump_status = "ON" if pump_state.get('is_on') else "OFF"
-                        else:
-                            # Try to convert text value to bool
-                            try:
-                                is_on = bool(int(str(pump_state)))
-                                pump_status = "ON" if is_on else "OFF"
-                            except (ValueError, TypeError):
-                                pump_status = "UNKNOWN"
-                    except Exception as e:
-                        logger.error(f"Failed to parse pump state: {e}")
-                        pump_status = "UNKNOWN"
-                else:
-                    pump_status = "OFF (API check failed)"
-        else:
-            pump_status = "OFF (Never run)"
-
-        embed = discord.Embed(title="lBIS Status", color=discord.Color.blue())
-        embed.add_field(name="API Service", value=api_status, inline=False)
-        embed.add_field(name="Session Time", value=session_time_str, inline=True)
-        embed.add_field(name="Banked Time", value=banked_time_str, inline=True)
-        embed.add_field(name="Latch", value=latch_status, inline=True)
-        embed.add_field(name="Pump", value=pump_status, inline=True)
-
+            async with asyncio.timeout(INTERACTION_TIMEOUT):
+                embed = await build_status_embed(self.bot)
+        except TimeoutError:
+            await interaction.response.send_message("Timed out while checking the device's status.", ephemeral=True)
+            return
         await interaction.response.send_message(embed=embed)
 
     @app_commands.command(name="reboot", description="[Privileged Only] Restarts the bot.")
@@ -107,8 +61,7 @@ class AdminGroup(app_commands.Group):
         await interaction.response.send_message("Rebooting...", ephemeral=True)
         logger.warning(f"Reboot initiated by {interaction.user} ({interaction.user.id})")
         # Ensure session state is saved before exiting
-        from utils import save_session_state  # Local import to avoid circular dependency if moved
-        save_session_state(self.bot)
+        await save_session_state_async(self.bot)
         logger.info("Session state saved before reboot.")
         # Use os.execv to replace the current process with a new instance
         os.execv(sys.executable, ['python'] + sys.argv)
@@ -121,13 +74,11 @@ class AdminGroup(app_commands.Group):
             await interaction.response.send_message("This command can only be used in DMs.", ephemeral=True)
             return
 
-        # Access wearer_secret from bot's config
-        if secret == self.bot.config.get("wearer_secret"):
-            # Update config directly if needed, or just save
-            self.bot.config['wearer_id'] = interaction.user.id  # Update config in memory
-            save_wearer_id(self.bot, interaction.user.id)  # Save to bot.json
-            await self.bot.request_status_update()  # Use bot method
+        # Constant-time comparison so the secret can't be guessed from response timing
+        if hmac.compare_digest(secret.encode(), self.bot.wearer_secret.encode()):
+            save_wearer_id(self.bot, interaction.user.id)  # Updates the config in memory and saves it to bot.json
             await interaction.response.send_message("You are now registered as this device's wearer!", ephemeral=True)
+            self.bot.request_status_update()  # Use bot method
             logger.info(f"Wearer registered: {interaction.user} ({interaction.user.id})")
         else:
             await interaction.response.send_message("Incorrect secret.", ephemeral=True)
@@ -149,12 +100,9 @@ class BankGroup(app_commands.Group):
             await interaction.response.send_message("Please provide a positive number of seconds.", ephemeral=True)
             return
 
-        max_bank = self.bot.config.get('max_banked_time', 3600)
-        old_banked_time = self.bot.banked_time
-        self.bot.banked_time = min(old_banked_time + seconds, max_bank)
-        added_time = self.bot.banked_time - old_banked_time
+        added_time = add_banked_time(self.bot, seconds)
 
-        save_session_state(self.bot)
+        mark_session_dirty(self.bot)
         logger.info(f"Wearer manually banked {added_time}s. New banked time: {self.bot.banked_time}s.")
 
         await interaction.response.send_message(
@@ -162,7 +110,7 @@ class BankGroup(app_commands.Group):
             f"Total banked time is now {format_time(self.bot.banked_time)}.",
             ephemeral=True
         )
-        await self.bot.request_status_update()
+        self.bot.request_status_update()
 
     @app_commands.command(name="rem", description="[Wearer Only] Manually remove time from the bank.")
     @check_is_wearer()
@@ -175,9 +123,10 @@ class BankGroup(app_commands.Group):
 
         old_banked_time = self.bot.banked_time
         self.bot.banked_time = max(0, old_banked_time - seconds)
+        notify_budget_changed(self.bot)
         removed_time = old_banked_time - self.bot.banked_time
 
-        save_session_state(self.bot)
+        mark_session_dirty(self.bot)
         logger.info(f"Wearer manually removed {removed_time}s from bank. New banked time: {self.bot.banked_time}s.")
 
         await interaction.response.send_message(
@@ -185,7 +134,7 @@ class BankGroup(app_commands.Group):
             f"Total banked time is now {format_time(self.bot.banked_time)}.",
             ephemeral=True
         )
-        await self.bot.request_status_update()
+        self.bot.request_status_update()
 
     @app_commands.command(name="set", description="[Wearer Only] Manually set the banked time.")
     @check_is_wearer()
@@ -196,18 +145,19 @@ class BankGroup(app_commands.Group):
             await interaction.response.send_message("Please provide a non-negative number of seconds.", ephemeral=True)
             return
 
-        max_bank = self.bot.config.get('max_banked_time', 3600)
+        max_bank = self.bot.max_banked_time
         old_banked_time = self.bot.banked_time
         self.bot.banked_time = min(seconds, max_bank)
+        notify_budget_changed(self.bot)
 
-        save_session_state(self.bot)
+        mark_session_dirty(self.bot)
         logger.info(f"Wearer manually set bank time to {self.bot.banked_time}s (was {old_banked_time}s). Limit was {max_bank}s.")
 
         await interaction.response.send_message(
             f"Banked time set to {format_time(self.bot.banked_time)}.",
             ephemeral=True
         )
-        await self.bot.request_status_update()
+        self.bot.request_status_update()
 
     @app_commands.command(name="reset", description="[Wearer Only] Resets the banked time to zero.")
     @check_is_wearer()
@@ -215,14 +165,15 @@ class BankGroup(app_commands.Group):
     async def reset(self, interaction: discord.Interaction):
         old_banked_time = self.bot.banked_time
         self.bot.banked_time = 0
-        save_session_state(self.bot)
+        notify_budget_changed(self.bot)
+        mark_session_dirty(self.bot)
         logger.info(f"Wearer reset banked time from {format_time(old_banked_time)} to 0.")
 
         await interaction.response.send_message(
             f"Banked time has been reset to 0 (was {format_time(old_banked_time)}).",
             ephemeral=True
         )
-        await self.bot.request_status_update()
+        self.bot.request_status_update()
 
 # --- Admin Cog --- #
 
@@ -3,10 +3,23 @@ from discord.ext import commands, tasks
 import aiohttp
 import asyncio
 import logging
-from utils import format_time, api_request, save_session_state, update_session_time, get_api_pump_state
+import random
+from utils import (
+    format_time, api_request, get_api_pump_state, known_pump_state, queue_wearer_dm, get_wearer, marco_probe,
+    start_session_debit, settle_session_debit, stop_session_debit, banked_time_left
+)
 
 logger = logging.getLogger(__name__)
 
+SERVICE_CHECK_INTERVAL = 15.0  # Seconds between probes while the service is up
+SERVICE_RETRY_MAX = 60.0  # Cap for the retry backoff while the service is down
+PRESENCE_DEBOUNCE = 2.0  # Seconds to gather presence update requests before applying them
+WEARER_DM_TIMEOUT = 10.0  # Give up on a single wearer DM after this long so the outbox keeps moving
+PUMP_STATE_TTL = 5.0  # Reuse a recorded pump state this fresh instead of asking the device again
+
+# Presences shown while the bot or the API is unavailable never change, so build them once
+_STATIC_ACTIVITIES = {name: discord.Game(name=name) for name in ("API Down", "Starting...")}
+
 class MonitorCog(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
@@ -15,110 +28,171 @@ class MonitorCog(commands.Cog):
         if not self.bot.device_base_url:
             logger.warning("API base URL not found in config! Monitoring tasks might fail.")
         else:
-            logger.info(f"API base URL loaded: {self.bot.device_base_url}")
+            logger.info("API base URL loaded: %s", self.bot.device_base_url)
+
+        self._retry_backoff: float | None = None  # Current retry backoff, None while the service is up
+        self._last_presence: tuple[discord.Status, str] | None = None  # Last presence sent to Discord
 
         self.service_monitor_task.start()
-        self.session_timer.start()
+        self.status_update_task.start()
+        self.wearer_dm_task.start()
 
     def cog_unload(self):
         self.service_monitor_task.cancel()
-        self.session_timer.cancel()
+        self.status_update_task.cancel()
+        self.wearer_dm_task.cancel()
 
     async def update_bot_status(self):
         """Updates the bot's Discord presence based on current state."""
-        if not self.bot.is_ready() or not self.bot.service_was_up:
+        bot = self.bot  # Bound once; read many times below
+        if not bot.is_ready() or not bot.service_was_up:
             status = discord.Status.dnd # Do Not Disturb if not ready or API down
-            activity_string = "API Down" if not self.bot.service_was_up else "Starting..."
-            activity = discord.Game(name=activity_string)
+            activity_string = "API Down" if not bot.service_was_up else "Starting..."
         else:
             status = discord.Status.online
-            session_str = format_time(self.bot.session_time_remaining)
-            banked_str = format_time(self.bot.banked_time)
-            latch_str = "🔒" if self.bot.latch_active else ""
+            latch_str = "🔒" if bot.latch_active else ""
 
             pump_state_str = ""
-            if self.bot.pump_task and not self.bot.pump_task.done():
+            if bot.pump_active:
                 pump_state_str = "ON" # If task is running, it must be ON
             else:
-                pump_is_on = await get_api_pump_state(self.bot)
+                pump_level = known_pump_state(bot, PUMP_STATE_TTL)
+                if pump_level is not None:
+                    pump_is_on = pump_level > 0
+                else:
+                    pump_is_on = await get_api_pump_state(bot)
                 if pump_is_on is None:
                     pump_state_str = "UNKNOWN"
                 else:
                     pump_state_str = "ON" if pump_is_on else "OFF"
+                    # Keep the session debit in step with the device, e.g. if it was switched on there
+                    if pump_is_on:
+                        start_session_debit(bot)
+                    else:
+                        stop_session_debit(bot)
+
+            settle_session_debit(bot)
+            session_str = format_time(bot.session_time_remaining)
+            banked_str = format_time(banked_time_left(bot))
 
             activity_string = f"{latch_str}Pump: {pump_state_str} | Sess: {session_str} | Bank: {banked_str}"
-            activity = discord.CustomActivity(name=activity_string)
 
+        if self._last_presence == (status, activity_string):
+            return  # Nothing visible changed; skip the gateway update
+        activity = _STATIC_ACTIVITIES.get(activity_string) or discord.CustomActivity(name=activity_string)
         try:
-            await self.bot.change_presence(status=status, activity=activity)
-            logger.debug(f"Updated presence: {status}, Activity: {activity_string}")
-        except Exception as e:
-            logger.error(f"Failed to update presence: {e}")
-
-    @tasks.loop(seconds=15)
+            await bot.change_presence(status=status, activity=activity)
+        except discord.ConnectionClosed as e:
+            logger.warning("Failed to update presence, gateway connection closed: %s", e)
+            return
+        except discord.HTTPException as e:
+            logger.error("Failed to update presence: %s", e)
+            return
+        self._last_presence = (status, activity_string)
+        logger.debug("Updated presence: %s, Activity: %s", status, activity_string)
+
+    def _next_retry_delay(self, initial: float) -> float:
+        """Returns the next probe delay while the service is down (capped exponential backoff with jitter)."""
+        if self._retry_backoff is None:
+            self._retry_backoff = initial
+        delay = min(self._retry_backoff, SERVICE_RETRY_MAX) * (0.5 + random.random())
+        self._retry_backoff *= 2
+        return delay
+
+    @tasks.loop(seconds=SERVICE_CHECK_INTERVAL)
     async def service_monitor_task(self):
         """Background task to monitor service availability and update status"""
         was_previously_up = self.bot.service_was_up
+        failure = None
+        transient = False
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.get(f"{self.bot.API_BASE_URL}/api/marco", timeout=5) as resp:
-                    if resp.status == 200:
-                        self.bot.service_was_up = True
-                        if not was_previously_up and self.bot.OWNER_ID:
-                            try:
-                                wearer = await self.bot.fetch_user(self.bot.OWNER_ID)
-                                if wearer:
-                                    await wearer.send("✅ Service is back up!")
-                            except Exception as e:
-                                print(f"Failed to DM wearer about service up: {e}")
-                    else:
-                        raise Exception(f"Non-200 status: {resp.status}")
-        except Exception as e:
+            # Shared with /admin marco; a successful probe also feeds /admin status via the API cache
+            status, _ = await marco_probe(self.bot, head=True)  # Only the status matters here
+            if status != 200:
+                failure = f"Non-200 status: {status}"
+        except (asyncio.TimeoutError, aiohttp.ClientConnectorError) as e:
+            # Connection-level failures are usually transient, so retry those quickly at first
+            failure = e
+            transient = True
+        except aiohttp.ClientError as e:
+            failure = e
+
+        if failure is None:
+            self.bot.service_was_up = True
+            if self._retry_backoff is not None:
+                # Back up: return to the regular probe cadence
+                self._retry_backoff = None
+                self.service_monitor_task.change_interval(seconds=SERVICE_CHECK_INTERVAL)
+            if not was_previously_up and self.bot.OWNER_ID:
+                queue_wearer_dm(self.bot, "✅ Service is back up!")
+        else:
             if was_previously_up:
-                 print(f"Service check failed: {e}")
+                 logger.warning("Service check failed: %s", failure)
                  if self.bot.OWNER_ID:
-                    try:
-                        wearer = await self.bot.fetch_user(self.bot.OWNER_ID)
-                        if wearer:
-                            await wearer.send("⚠️ Service appears to be down!")
-                    except Exception as notify_e:
-                        print(f"Failed to DM wearer about service down: {notify_e}")
+                    queue_wearer_dm(self.bot, "⚠️ Service appears to be down!")
             self.bot.service_was_up = False
+            self.bot.pump_interrupt_event.set()  # Stop any running pump task now rather than at its next tick
+            stop_session_debit(self.bot)  # Can't tell whether a manually started pump is still running
+            self.service_monitor_task.change_interval(seconds=self._next_retry_delay(1.0 if transient else 5.0))
 
-        await self.update_bot_status()
+        self.bot.request_status_update()
 
     @service_monitor_task.before_loop
     async def before_service_monitor(self):
         await self.bot.wait_until_ready()
 
-    @tasks.loop(seconds=1.0)
-    async def session_timer(self):
-        """Decrements session time remaining every second."""
-        if not self.bot.is_ready() or not self.bot.service_was_up:
-            return
+    @service_monitor_task.error
+    async def service_monitor_error(self, error: BaseException):
+        # Anything other than a failed probe is a bug; log it, but keep monitoring. Back off first
+        # (sharing the down-service backoff, reset by the next good probe) so a bug that fails
+        # every iteration doesn't turn into a busy restart loop
+        delay = self._next_retry_delay(5.0)
+        logger.error("Service monitor task crashed, restarting it in %.1fs.", delay, exc_info=error)
+        await asyncio.sleep(delay)  # Runs inside the loop's task, so cog_unload's cancel still ends it
+        self.service_monitor_task.restart()
+
+    @tasks.loop()
+    async def status_update_task(self):
+        """Applies requested presence updates; requests within the debounce window are coalesced."""
+        await self.bot.status_dirty.wait()
+        await asyncio.sleep(PRESENCE_DEBOUNCE)
+        self.bot.status_dirty.clear()
+        await self.update_bot_status()
 
-        if not self.bot.device_base_url:
-            logger.warning("Device base URL not set, cannot enforce pump state for session timer.")
-
-        is_manually_on = False
-        if not (self.bot.pump_task and not self.bot.pump_task.done()):
-            pump_is_on = await get_api_pump_state(self.bot)
-            if pump_is_on is True: # Explicitly check for True
-                is_manually_on = True
-            elif pump_is_on is None:
-                logger.warning("Session timer: Could not determine pump state from API.")
-
-        if is_manually_on:
-            if self.bot.session_time_remaining > 0:
-                update_session_time(self.bot, -1)
-                if self.bot.session_time_remaining == 0:
-                    logger.info("Session time reached zero while pump was manually on.")
-                    await self.update_bot_status()
-
-    @session_timer.before_loop
-    async def before_session_timer(self):
+    @status_update_task.before_loop
+    async def before_status_update(self):
+        await self.bot.wait_until_ready()
+
+    @status_update_task.error
+    async def status_update_error(self, error: BaseException):
+        # Gateway errors are handled in update_bot_status; anything else is a bug. Log it, but keep
+        # the presence updating. The loop only runs when an update is requested, so waiting the
+        # debounce window is enough to keep a persistent failure from spinning
+        logger.error("Status update task crashed, restarting it.", exc_info=error)
+        await asyncio.sleep(PRESENCE_DEBOUNCE)
+        self.status_update_task.restart()
+
+    @tasks.loop()
+    async def wearer_dm_task(self):
+        """Delivers queued wearer DMs one at a time, off the command path."""
+        message = await self.bot.wearer_outbox.get()
+        try:
+            async with asyncio.timeout(WEARER_DM_TIMEOUT):
+                wearer = await get_wearer(self.bot)
+                if wearer is None:
+                    return  # Wearer was unset after the message was queued
+                await wearer.send(message)
+        except TimeoutError:
+            logger.error("Failed to DM wearer: timed out after %ss", WEARER_DM_TIMEOUT)
+        except discord.NotFound:
+            self.bot._wearer_user = None  # Stale user; look it up again next time
+            logger.error("Failed to DM wearer: user not found")
+        except Exception as e:
+            logger.error("Failed to DM wearer: %s", e)
+
+    @wearer_dm_task.before_loop
+    async def before_wearer_dm(self):
         await self.bot.wait_until_ready()
-        logger.info("Session timer loop starting.")
 
 async def setup(bot):
     monitor_cog = MonitorCog(bot)
@@ -1,13 +1,13 @@
 import asyncio
 import logging
-import time
 import discord
 from discord import app_commands
 from discord.ext import commands
 
 from utils import (
-    api_request, format_time, save_session_state, dm_wearer_on_use,
-    update_session_time, check_is_privileged, toggle_latch, set_latch_reason
+    set_api_pump_state, format_time, mark_session_dirty, save_session_state_async, dm_wearer_on_use,
+    update_session_time, add_banked_time, check_is_privileged, toggle_latch, set_latch_reason,
+    start_session_debit, stop_session_debit
 )
 from utils.permissions import check_is_wearer
 
@@ -28,7 +28,7 @@ class LatchGroup(app_commands.Group):
         success, message = await toggle_latch(self.bot, True, reason, duration)
         await interaction.response.send_message(message, ephemeral=True)
         if success:
-            await self.bot.request_status_update()
+            self.bot.request_status_update()
 
     @app_commands.command(name="off", description="[Wearer Only] Disengages the latch.")
     @check_is_wearer()
@@ -37,7 +37,7 @@ class LatchGroup(app_commands.Group):
         success, message = await toggle_latch(self.bot, False)
         await interaction.response.send_message(message, ephemeral=True)
         if success:
-            await self.bot.request_status_update()
+            self.bot.request_status_update()
 
     @app_commands.command(name="reason", description="[Wearer Only] Sets or clears the reason for the latch.")
     @check_is_wearer()
@@ -47,7 +47,7 @@ class LatchGroup(app_commands.Group):
         success, message = await set_latch_reason(self.bot, reason)
         await interaction.response.send_message(message, ephemeral=True)
         if success:
-            await self.bot.request_status_update()
+            self.bot.request_status_update()
 
     @app_commands.command(name="toggle", description="[Wearer Only] Toggles the safety latch on or off.")
     @check_is_wearer()
@@ -58,141 +58,144 @@ class LatchGroup(app_commands.Group):
         success, message = await toggle_latch(self.bot, new_state)
         await interaction.response.send_message(message, ephemeral=True)
         if success:
-            await self.bot.request_status_update()
+            self.bot.request_status_update()
 
 # --- Helper Functions (moved from old InflateGroup) ---
 
-async def _check_interruptions(bot) -> tuple[bool, str]:
-    """Checks for conditions that should interrupt the pump loop."""
+def _check_interruptions(bot) -> str:
+    """Returns why the pump loop should stop right now, or "" if it may keep running."""
     if bot.latch_active:
         logger.info("Pump interruption: Latch active.")
-        return True, "latched"
+        return "latched"
     if not bot.service_was_up:
         logger.info("Pump interruption: API service down.")
-        return True, "service down"
-    return False, ""
+        return "service down"
+    return ""
+
+async def _reject_if_pump_unavailable(bot, interaction: discord.Interaction, kind: str) -> bool:
+    """Replies and returns True if a `kind` pump can't be started right now (latched or API down)."""
+    if bot.latch_active:
+        message = f"Pump is latched, cannot start {kind} pump."
+    elif not bot.service_was_up:
+        message = "API service is down, cannot control pump."
+    else:
+        return False
+    await interaction.response.send_message(message, ephemeral=True)
+    return True
 
 async def _cleanup_pump_task(bot, actual_run_duration: float, consumed_session_time: int, interruption_reason: str = ""):
     """Handles the common cleanup tasks after a pump loop finishes or is interrupted."""
     logger.info(f"Pump task cleanup. Duration: {actual_run_duration:.2f}s, Consumed Session: {consumed_session_time}s, Reason: '{interruption_reason}'")
-    if await api_request(bot, "setPumpState", method="POST", data={"pump": 0}):
-        logger.info("Pump turned off via API.")
-        bot.last_pump_time = time.time()
-    else:
-        logger.error("Failed to turn off pump via API during cleanup.")
+    pump_off = asyncio.create_task(set_api_pump_state(bot, 0.0))
 
     if consumed_session_time > 0:
         update_session_time(bot, -consumed_session_time)
 
-    bot.pump_task = None
-    bot.pump_task_end_time = None
-
-    save_session_state(bot)
-    await bot.request_status_update()
+    # The saved state doesn't depend on the device's answer, so write it while the request is in flight
+    await asyncio.gather(pump_off, save_session_state_async(bot))
+    if pump_off.result():
+        logger.info("Pump turned off via API.")
+        bot.last_pump_time = asyncio.get_running_loop().time()
+    else:
+        logger.error("Failed to turn off pump via API during cleanup.")
+    bot.request_status_update()
 
     if interruption_reason:
         logger.warning(f"Pump task interrupted: {interruption_reason}. Ran for {format_time(int(actual_run_duration))}.")
     else:
         logger.info(f"Pump task completed successfully. Ran for {format_time(int(actual_run_duration))}.")
 
-async def _timed_pump_loop(bot, initial_run_seconds: int):
-    start_time = asyncio.get_event_loop().time()
+def _start_pump_task(bot, coro, name: str):
+    """Runs a pump loop as the bot's pump task, keeping bot.pump_active in step with it."""
+    bot.pump_active = True
+    task = asyncio.get_running_loop().create_task(coro, name=name)
+    bot.pump_task = task
+
+    def _on_done(_):
+        if bot.pump_task is task:
+            bot.pump_task = None
+            bot.pump_task_end_time = None
+            bot.pump_active = False
+            bot.pump_stopping = False
+    task.add_done_callback(_on_done)
+
+async def _pump_loop(bot, banked: bool):
+    """Runs the pump until its end time, or until something interrupts it.
+
+    A timed run is charged to the session when it ends, and banks whatever was left of it if
+    interrupted. A banked run is also paid for out of the bank when it ends.
+    """
+    kind = "banked" if banked else "timed"
+    loop = asyncio.get_running_loop()
+    start_time = loop.time()
+    current_time = start_time
     actual_run_duration = 0
-    interrupted = False
-    interruption_reason = ""
+    interruption_reason = ""  # Stays empty unless the run is cut short
+    decremented_bank = 0
+
+    if banked:
+        bot.banked_run_start = start_time  # Lets banked_time_left show the bank as it's being used
 
     try:
-        logger.info(f"Starting timed pump loop. Target end time: {bot.pump_task_end_time}")
-        while asyncio.get_event_loop().time() < bot.pump_task_end_time:
-            interrupted, interruption_reason = await _check_interruptions(bot)
-            if interrupted:
+        logger.info(f"Starting {kind} pump loop. Target end time: {bot.pump_task_end_time}")
+        while current_time < bot.pump_task_end_time:
+            bot.pump_interrupt_event.clear()
+            interruption_reason = _check_interruptions(bot)
+            if interruption_reason:
                 break
-            await asyncio.sleep(0.5)
-
-        actual_run_duration = asyncio.get_event_loop().time() - start_time
-        logger.info(f"Timed pump loop finished or interrupted after {actual_run_duration:.2f}s.")
 
-        if interrupted:
-            remaining_intended = bot.pump_task_end_time - asyncio.get_event_loop().time()
+            if banked:
+                # The bank or session may have been cut during the run; never pump longer than they cover
+                covered_until = start_time + min(bot.banked_time, bot.session_time_remaining)
+                if covered_until <= current_time:
+                    interruption_reason = "bank or session empty"
+                    logger.info("Bank or session time ran out during banked pump.")
+                    break
+                bot.pump_task_end_time = min(bot.pump_task_end_time, covered_until)
+
+            # Sleep until the end time, waking early only when something may need to stop the pump
+            try:
+                await asyncio.wait_for(bot.pump_interrupt_event.wait(), timeout=bot.pump_task_end_time - current_time)
+            except asyncio.TimeoutError:
+                pass
+            # The end time may have been extended in the meantime
+            current_time = loop.time()
+
+        # Nothing has awaited since the clock was last read, so reuse that reading
+        actual_run_duration = current_time - start_time
+        logger.info(f"{kind.capitalize()} pump loop finished or interrupted after {actual_run_duration:.2f}s.")
+
+        if interruption_reason and not banked:
+            remaining_intended = bot.pump_task_end_time - current_time
             if remaining_intended > 0:
-                max_bank = bot.config.get('max_banked_time', 3600)
-                old_banked = bot.banked_time
-                bot.banked_time = min(old_banked + int(remaining_intended), max_bank)
-                banked_amount = bot.banked_time - old_banked
+                banked_amount = add_banked_time(bot, remaining_intended)
                 if banked_amount > 0:
                     logger.info(f"Banking {banked_amount}s due to interruption ({interruption_reason}).")
-                    save_session_state(bot)
+                    mark_session_dirty(bot)
 
     except asyncio.CancelledError:
-        logger.info("Timed pump task cancelled.")
-        actual_run_duration = asyncio.get_event_loop().time() - start_time
-        interrupted = True
+        logger.info(f"{kind.capitalize()} pump task cancelled.")
+        actual_run_duration = loop.time() - start_time
         interruption_reason = "cancelled"
     finally:
-        await _cleanup_pump_task(bot, actual_run_duration, int(actual_run_duration), interruption_reason)
-
-async def _banked_pump_loop(bot, initial_run_seconds: int):
-    start_time = asyncio.get_event_loop().time()
-    actual_run_duration = 0
-    interrupted = False
-    interruption_reason = ""
-    decremented_bank = 0
-    decremented_session = 0
-
-    try:
-        logger.info(f"Starting banked pump loop. Target end time: {bot.pump_task_end_time}")
-        last_decrement_time = start_time
-
-        while asyncio.get_event_loop().time() < bot.pump_task_end_time:
-            interrupted, interruption_reason = await _check_interruptions(bot)
-            if interrupted:
-                break
-
-            if bot.banked_time <= 0:
-                interrupted = True
-                interruption_reason = "bank empty"
-                logger.info("Bank ran out during banked pump.")
-                break
-            if bot.session_time_remaining <= 0:
-                interrupted = True
-                interruption_reason = "session empty"
-                logger.info("Session time ran out during banked pump.")
-                break
-
-            current_time = asyncio.get_event_loop().time()
-            elapsed_since_decrement = current_time - last_decrement_time
-            if elapsed_since_decrement >= 1.0:
-                decrement_amount = int(elapsed_since_decrement)
-                actual_decrement = min(decrement_amount, bot.banked_time, bot.session_time_remaining)
-
-                if actual_decrement > 0:
-                    bot.banked_time -= actual_decrement
-                    decremented_bank += actual_decrement
-                    decremented_session += actual_decrement
-                    last_decrement_time = current_time
-                else:
-                    interrupted = True
-                    interruption_reason = "bank or session empty on decrement"
-                    logger.info("Stopping banked pump as bank or session reached zero during decrement check.")
-                    break
-
-            await asyncio.sleep(0.2)
-
-        actual_run_duration = asyncio.get_event_loop().time() - start_time
-        logger.info(f"Banked pump loop finished or interrupted after {actual_run_duration:.2f}s.")
-
-    except asyncio.CancelledError:
-        logger.info("Banked pump task cancelled.")
-        actual_run_duration = asyncio.get_event_loop().time() - start_time
-        interrupted = True
-        interruption_reason = "cancelled"
-    finally:
-        await _cleanup_pump_task(bot, actual_run_duration, decremented_session, interruption_reason)
+        if banked:
+            bot.banked_run_start = None
+            # Never take more than is left, in case the bank or session was changed during the run
+            decremented_bank = min(int(actual_run_duration), bot.banked_time, bot.session_time_remaining)
+            bot.banked_time -= decremented_bank
+        consumed_session_time = decremented_bank if banked else int(actual_run_duration)
+        bot.pump_stopping = True  # The run is over; commands must not extend or retarget it any more
+        cleanup = asyncio.ensure_future(_cleanup_pump_task(bot, actual_run_duration, consumed_session_time, interruption_reason))
+        try:
+            await asyncio.shield(cleanup)
+        except asyncio.CancelledError:
+            await cleanup  # A cancel arriving mid-cleanup must not abort the pump-off or the save
+            raise
         if decremented_bank > 0:
             logger.info(f"Consumed {format_time(decremented_bank)} from bank.")
 
 async def _start_timed_pump(bot, interaction: discord.Interaction, seconds: int):
-    max_pump_duration = bot.config.get('max_pump_duration', 60)
+    max_pump_duration = bot.max_pump_duration
 
     if seconds <= 0:
         await interaction.response.send_message("Please provide a positive duration in seconds.", ephemeral=True)
@@ -202,20 +205,18 @@ async def _start_timed_pump(bot, interaction: discord.Interaction, seconds: int)
         await interaction.response.send_message(f"Maximum duration allowed is {max_pump_duration} seconds (configurable via 'max_pump_duration' in bot.json).", ephemeral=True)
         return
 
-    if bot.latch_active:
-        await interaction.response.send_message("Pump is latched, cannot start timed pump.", ephemeral=True)
+    if await _reject_if_pump_unavailable(bot, interaction, "timed"):
         return
 
-    if not bot.service_was_up:
-        await interaction.response.send_message("API service is down, cannot control pump.", ephemeral=True)
-        return
-
-    loop = asyncio.get_event_loop()
+    loop = asyncio.get_running_loop()
     current_time = loop.time()
-    max_bank = bot.config.get('max_banked_time', 3600)
-    response_message = ""
 
-    if bot.pump_task and not bot.pump_task.done():
+    if bot.pump_active and (bot.pump_stopping or bot.pump_task_end_time is None):
+        # The run has ended and is turning the pump off; extending it would be lost
+        await interaction.response.send_message("The pump is stopping, try again in a moment.", ephemeral=True)
+        return
+
+    if bot.pump_active:
         logger.info(f"Pump task already running. Extending timer.")
         remaining_current = max(0, bot.pump_task_end_time - current_time)
         max_possible_additional = max(0, bot.session_time_remaining - remaining_current)
@@ -228,25 +229,27 @@ async def _start_timed_pump(bot, interaction: discord.Interaction, seconds: int)
 
         banked_amount = 0
         if overflow > 0:
-            old_banked = bot.banked_time
-            bot.banked_time = min(old_banked + int(overflow), max_bank)
-            banked_amount = bot.banked_time - old_banked
+            banked_amount = add_banked_time(bot, overflow)
             if banked_amount > 0:
                 logger.info(f"Banking {banked_amount}s overflow from inflate extension.")
-                save_session_state(bot)
+                mark_session_dirty(bot)
 
         bot.pump_task_end_time = current_time + remaining_current + time_to_add
         logger.info(f"Extended pump task. New end time: {bot.pump_task_end_time}. Added: {time_to_add:.2f}s.")
 
-        response_message = f"Pump timer already running. Extended by {format_time(int(time_to_add))} using session time."
         if banked_amount > 0:
-            response_message += f" Banked {format_time(banked_amount)} overflow (max session/pump duration or input limit reached)."
+            note = f" Banked {format_time(banked_amount)} overflow (max session/pump duration or input limit reached)."
         elif time_to_add < seconds:
-            response_message += f" Could not add full duration due to session/pump limits."
+            note = " Could not add full duration due to session/pump limits."
+        else:
+            note = ""
+        response_message = f"Pump timer already running. Extended by {format_time(int(time_to_add))} using session time.{note}"
 
         await interaction.response.send_message(response_message)
 
     else:
+        # The pump task charges session time itself from here on
+        stop_session_debit(bot)
         if bot.session_time_remaining <= 0:
             await interaction.response.send_message("No session time remaining.", ephemeral=True)
             return
@@ -258,36 +261,32 @@ async def _start_timed_pump(bot, interaction: discord.Interaction, seconds: int)
             return
 
         logger.info(f"Starting new timed pump for {run_seconds}s at intensity {bot.pump_intensity:.2f}.")
-        if await api_request(bot, "setPumpState", method="POST", data={"pump": bot.pump_intensity}):
-            bot.last_pump_time = time.time()
-            bot.pump_task_end_time = current_time + run_seconds
-            bot.pump_task = asyncio.create_task(_timed_pump_loop(bot, run_seconds))
-
-            response_message = f"Pump started for {format_time(run_seconds)} at intensity {bot.pump_intensity:.2f} using session time."
-            if run_seconds < seconds:
-                response_message += f" (Limited by session time)."
-            await interaction.response.send_message(response_message)
-
-            await bot.request_status_update()
+        await interaction.response.defer(thinking=True)  # The device may take longer than Discord's 3s response window
+        if await set_api_pump_state(bot, bot.pump_intensity):
+            started_at = loop.time()  # Not current_time: the API call above took a while
+            bot.last_pump_time = started_at
+            bot.pump_task_end_time = started_at + run_seconds
+            _start_pump_task(bot, _pump_loop(bot, banked=False), "pump_timed")
+
+            note = " (Limited by session time)." if run_seconds < seconds else ""
+            response_message = f"Pump started for {format_time(run_seconds)} at intensity {bot.pump_intensity:.2f} using session time.{note}"
+            await interaction.followup.send(response_message)
+
+            bot.request_status_update()
         else:
-            await interaction.response.send_message("Failed to start pump via API.", ephemeral=True)
+            await interaction.followup.send("Failed to start pump via API.")
 
 async def _start_banked_pump(bot, interaction: discord.Interaction, seconds: int):
-    max_pump_duration = bot.config.get('max_pump_duration', 60)
+    max_pump_duration = bot.max_pump_duration
 
     if seconds <= 0:
         await interaction.response.send_message("Please provide a positive duration.", ephemeral=True)
         return
 
-    if bot.latch_active:
-        await interaction.response.send_message("Pump is latched, cannot start banked pump.", ephemeral=True)
-        return
-
-    if not bot.service_was_up:
-        await interaction.response.send_message("API service is down, cannot control pump.", ephemeral=True)
+    if await _reject_if_pump_unavailable(bot, interaction, "banked"):
         return
 
-    if bot.pump_task and not bot.pump_task.done():
+    if bot.pump_active:
         await interaction.response.send_message("Another pump operation is already running.", ephemeral=True)
         return
 
@@ -295,6 +294,9 @@ async def _start_banked_pump(bot, interaction: discord.Interaction, seconds: int
         await interaction.response.send_message("No time in the bank.", ephemeral=True)
         return
 
+    # The pump task charges session time itself from here on
+    stop_session_debit(bot)
+
     if bot.session_time_remaining <= 0:
         await interaction.response.send_message("No session time remaining (required to use bank).", ephemeral=True)
         return
@@ -306,38 +308,51 @@ async def _start_banked_pump(bot, interaction: discord.Interaction, seconds: int
         return
 
     logger.info(f"Starting banked pump for {run_seconds}s at intensity {bot.pump_intensity:.2f}.")
-    if await api_request(bot, "setPumpState", method="POST", data={"pump": bot.pump_intensity}):
-        bot.last_pump_time = time.time()
-        bot.pump_task_end_time = asyncio.get_event_loop().time() + run_seconds
-        bot.pump_task = asyncio.create_task(_banked_pump_loop(bot, run_seconds))
-
-        response_message = f"Pump started using banked time for {format_time(run_seconds)} at intensity {bot.pump_intensity:.2f}."
-        if run_seconds < seconds:
-            response_message += f" (Limited by bank, session time, or max duration)."
-        await interaction.response.send_message(response_message)
-
-        await bot.request_status_update()
+    await interaction.response.defer(thinking=True)  # The device may take longer than Discord's 3s response window
+    if await set_api_pump_state(bot, bot.pump_intensity):
+        started_at = asyncio.get_running_loop().time()
+        bot.last_pump_time = started_at
+        bot.pump_task_end_time = started_at + run_seconds
+        _start_pump_task(bot, _pump_loop(bot, banked=True), "pump_banked")
+
+        note = " (Limited by bank, session time, or max duration)." if run_seconds < seconds else ""
+        response_message = f"Pump started using banked time for {format_time(run_seconds)} at intensity {bot.pump_intensity:.2f}.{note}"
+        await interaction.followup.send(response_message)
+
+        bot.request_status_update()
     else:
-        await interaction.response.send_message("Failed to start pump via API.", ephemeral=True)
+        await interaction.followup.send("Failed to start pump via API.")
 
 async def _set_pump_intensity(bot, interaction: discord.Interaction, intensity: float):
     """Helper function to set pump intensity via API and update state."""
+    # Stopping a pump task and then the API call may take longer than Discord's 3s response window
+    await interaction.response.defer(ephemeral=True, thinking=True)
     # Cancel any running timed pump task first
-    if bot.pump_task and not bot.pump_task.done():
-        bot.pump_task.cancel()
+    task = bot.pump_task
+    if task is not None:
+        task.cancel()
         logger.info("Cancelled running pump task due to manual intensity change.")
-        # Wait briefly for cancellation to potentially process before sending new state
-        await asyncio.sleep(0.1)
+        # Wait for its cleanup (which turns the pump off) to finish before sending the new state
+        await asyncio.wait({task})
 
-    if await api_request(bot, "setPumpState", method="POST", data={"pump": intensity}):
-        bot.last_pump_time = time.time()
+    if await set_api_pump_state(bot, intensity):
+        bot.last_pump_time = asyncio.get_running_loop().time()
         bot.pump_intensity = intensity  # Update bot state
-        save_session_state(bot)
-        state_str = "OFF" if intensity == 0.0 else f"ON (Intensity: {intensity:.2f})"
-        await interaction.response.send_message(f"Pump set to {state_str}.", ephemeral=True)
-        await bot.request_status_update()
+        # Running outside a pump task, so charge session time until it's switched off
+        if intensity > 0.0:
+            start_session_debit(bot)
+        else:
+            stop_session_debit(bot)
+        mark_session_dirty(bot)
+        if intensity > 0.0 and bot.session_debit_start is None:
+            # start_session_debit found no session time left and is already switching it back off
+            await interaction.followup.send("No session time remaining, so the pump was switched back off.", ephemeral=True)
+        else:
+            state_str = "OFF" if intensity == 0.0 else f"ON (Intensity: {intensity:.2f})"
+            await interaction.followup.send(f"Pump set to {state_str}.", ephemeral=True)
+        bot.request_status_update()
     else:
-        await interaction.response.send_message("Failed to set pump intensity via API.", ephemeral=True)
+        await interaction.followup.send("Failed to set pump intensity via API.", ephemeral=True)
 
 async def _start_manual_pump(bot, interaction: discord.Interaction):
     await _set_pump_intensity(bot, interaction, 1.0)
@@ -375,26 +390,32 @@ class PumpGroup(app_commands.Group):
             await interaction.response.send_message("Intensity must be between 0.0 and 1.0.", ephemeral=True)
             return
 
-        # Update the default intensity state and save
-        self.bot.pump_intensity = intensity
-        save_session_state(self.bot)
+        # Update the default intensity state and save (if it changed)
+        if intensity != self.bot.pump_intensity:
+            self.bot.pump_intensity = intensity
+            mark_session_dirty(self.bot)
         logger.info(f"Pump intensity set to {intensity:.2f} by {interaction.user}.")
         response_message = f"Pump intensity set to {intensity:.2f}."
 
-        # Check if a pump task is currently running
-        if self.bot.pump_task and not self.bot.pump_task.done():
+        # Check if a pump task is currently running, and not already at this intensity
+        applying = self.bot.pump_active and not self.bot.pump_stopping and self.bot.current_pump_state != intensity
+        if applying:
+            await interaction.response.defer(ephemeral=True, thinking=True)  # Don't let the API call outlast Discord's 3s window
             logger.info(f"Pump task is running. Updating current intensity to {intensity:.2f} via API.")
             # Call API to change the intensity of the currently running pump
-            if await api_request(self.bot, "setPumpState", method="POST", data={"pump": intensity}):
+            if await set_api_pump_state(self.bot, intensity):
                 logger.info(f"Successfully updated running pump intensity to {intensity:.2f}.")
                 response_message += f"\nApplied intensity {intensity:.2f} to the currently running pump."
             else:
                 logger.error(f"Failed to update running pump intensity to {intensity:.2f} via API.")
                 response_message += "\n⚠️ Failed to apply intensity to the currently running pump (API error)."
 
-        await interaction.response.send_message(response_message, ephemeral=True)
+        if applying:
+            await interaction.followup.send(response_message, ephemeral=True)
+        else:
+            await interaction.response.send_message(response_message, ephemeral=True)
         # Update status in case it reflects intensity
-        await self.bot.request_status_update()
+        self.bot.request_status_update()
 
 # --- Standalone Commands --- #
 
@@ -406,23 +427,25 @@ class PumpCog(commands.Cog):
         bot.tree.add_command(LatchGroup(bot))
 
     async def cog_unload(self):
-        if self.bot.pump_task and not self.bot.pump_task.done():
-            self.bot.pump_task.cancel()
+        task = self.bot.pump_task
+        if task is not None:
+            task.cancel()
             logger.info("Cancelled running pump task on cog unload.")
-        # Remove the commands when unloading
+            # Let its cleanup turn the pump off and save before bot.close() closes the HTTP session
+            await asyncio.wait({task})
+        # Remove the command groups when unloading; the cog's own commands (inflate, inflate_debt)
+        # are removed from the tree by discord.py along with the cog
         self.bot.tree.remove_command("pump")
         self.bot.tree.remove_command("latch")
-        self.bot.tree.remove_command("inflate")
-        self.bot.tree.remove_command("inflate_debt")
 
     @app_commands.command(name="inflate", description="Runs the pump for a duration using session time.")
     @app_commands.describe(seconds="Number of seconds to run (uses default if omitted by non-privileged user).")
     @dm_wearer_on_use("inflate")
     async def inflate(self, interaction: discord.Interaction, seconds: int = None):
-        is_privileged_user = interaction.user.id == self.bot.config.get('wearer_id')
+        is_privileged_user = interaction.user.id == self.bot.config['wearer_id']
         duration = seconds
         if seconds is None and not is_privileged_user:
-            duration = self.bot.config.get('default_pump_duration', 30)
+            duration = self.bot.default_pump_duration
         elif seconds is None and is_privileged_user:
             await interaction.response.send_message("Please specify a duration in seconds.", ephemeral=True)
             return
@@ -2,7 +2,7 @@ import discord
 from discord.ext import commands
 from discord import app_commands
 import logging # Added logging
-from utils import is_wearer, format_time, update_session_time, save_session_state, dm_wearer_on_use, check_is_wearer # Added imports
+from utils import is_wearer, format_time, update_session_time, mark_session_dirty, dm_wearer_on_use, check_is_wearer, settle_session_debit, notify_budget_changed # Added imports
 
 logger = logging.getLogger(__name__) # Added logger
 
@@ -18,14 +18,16 @@ class SessionGroup(app_commands.Group):
     @app_commands.describe(minutes="Minutes to add to the session.")
     @dm_wearer_on_use("session add")
     async def add(self, interaction: discord.Interaction, minutes: int):
-        max_session = self.bot.config.get('max_session_time', 7200) # Default 2hr
+        bot = self.bot
+        settle_session_debit(bot)  # Count time used by a manually running pump first
+        max_session = bot.max_session_time
 
         if minutes <= 0:
             await interaction.response.send_message("Please specify a positive number of minutes.", ephemeral=True)
             return
 
         # Calculate potential new time without exceeding max
-        current_time = self.bot.session_time_remaining
+        current_time = bot.session_time_remaining
         time_to_add = minutes * 60
         new_time = min(current_time + time_to_add, max_session)
         actual_added = new_time - current_time
@@ -34,29 +36,37 @@ class SessionGroup(app_commands.Group):
              await interaction.response.send_message(f"Session time is already at or above the maximum ({format_time(max_session)}). Cannot add more time.", ephemeral=True)
              return
 
-        self.bot.session_time_remaining = new_time
-        save_session_state(self.bot)
-        await self.bot.request_status_update()
-        await interaction.response.send_message(f"Added {format_time(actual_added)} to session. {format_time(self.bot.session_time_remaining)} remaining.", ephemeral=True)
+        bot.session_time_remaining = new_time
+        notify_budget_changed(bot)
+        mark_session_dirty(bot)
+        await interaction.response.send_message(f"Added {format_time(actual_added)} to session. {format_time(bot.session_time_remaining)} remaining.", ephemeral=True)
+        bot.request_status_update()
 
     @app_commands.command(name="rem", description="[Wearer Only] Remove time from the current session.")
     @check_is_wearer()
     @app_commands.describe(minutes="Minutes to remove from the session.")
     @dm_wearer_on_use("session rem")
     async def rem(self, interaction: discord.Interaction, minutes: int):
+        bot = self.bot
+        settle_session_debit(bot)  # Count time used by a manually running pump first
         if minutes <= 0:
             await interaction.response.send_message("Please specify a positive number of minutes.", ephemeral=True)
             return
 
-        current_time = self.bot.session_time_remaining
+        current_time = bot.session_time_remaining
         time_to_remove = minutes * 60
         new_time = max(0, current_time - time_to_remove)
         actual_removed = current_time - new_time
 
-        self.bot.session_time_remaining = new_time
-        save_session_state(self.bot)
-        await self.bot.request_status_update()
-        await interaction.response.send_message(f"Removed {format_time(actual_removed)} from session. {format_time(self.bot.session_time_remaining)} remaining.", ephemeral=True)
+        if actual_removed <= 0:
+            await interaction.response.send_message("No session time to remove.", ephemeral=True)
+            return
+
+        bot.session_time_remaining = new_time
+        notify_budget_changed(bot)
+        mark_session_dirty(bot)
+        await interaction.response.send_message(f"Removed {format_time(actual_removed)} from session. {format_time(bot.session_time_remaining)} remaining.", ephemeral=True)
+        bot.request_status_update()
 
 
     @app_commands.command(name="set", description="[Wearer Only] Set the session timer to a specific value.")
@@ -64,7 +74,9 @@ class SessionGroup(app_commands.Group):
     @app_commands.describe(minutes="Minutes to set the session timer to.")
     @dm_wearer_on_use("session set")
     async def set(self, interaction: discord.Interaction, minutes: int):
-        max_session = self.bot.config.get('max_session_time', 7200) # Default 2hr
+        bot = self.bot
+        settle_session_debit(bot)  # Count time used by a manually running pump first
+        max_session = bot.max_session_time
 
         if minutes < 0:
             await interaction.response.send_message("Please specify a non-negative number of minutes.", ephemeral=True)
@@ -72,25 +84,33 @@ class SessionGroup(app_commands.Group):
 
         new_time_seconds = min(minutes * 60, max_session)
 
-        self.bot.session_time_remaining = new_time_seconds
+        if new_time_seconds == bot.session_time_remaining and bot.session_pump_start is None:
+            await interaction.response.send_message(f"Session time is already {format_time(new_time_seconds)}.", ephemeral=True)
+            return
+
+        bot.session_time_remaining = new_time_seconds
+        notify_budget_changed(bot)
         # Note: We are NOT updating default_session_time here anymore. Reset handles that.
-        self.bot.session_pump_start = None # Clear pump start if setting time manually
-        save_session_state(self.bot)
-        await self.bot.request_status_update()
-        await interaction.response.send_message(f"Session time set to {format_time(self.bot.session_time_remaining)}.", ephemeral=True)
+        bot.session_pump_start = None # Clear pump start if setting time manually
+        mark_session_dirty(bot)
+        await interaction.response.send_message(f"Session time set to {format_time(bot.session_time_remaining)}.", ephemeral=True)
+        bot.request_status_update()
 
 
     @app_commands.command(name="reset", description="[Wearer Only] Reset the session timer to the default duration.")
     @check_is_wearer()
     @dm_wearer_on_use("session reset")
     async def reset(self, interaction: discord.Interaction):
+        bot = self.bot
+        settle_session_debit(bot)  # Count time used by a manually running pump first
         # Use the stored default time from config
-        default_session_time = self.bot.config.get('default_session_time', 1800)
-        self.bot.session_time_remaining = default_session_time
-        self.bot.session_pump_start = None # Also clear pump start time
-        save_session_state(self.bot)
-        await self.bot.request_status_update()
-        await interaction.response.send_message(f"Session timer has been reset to the default: {format_time(self.bot.session_time_remaining)}.", ephemeral=True)
+        default_session_time = bot.config['default_session_time']
+        bot.session_time_remaining = default_session_time
+        notify_budget_changed(bot)
+        bot.session_pump_start = None # Also clear pump start time
+        mark_session_dirty(bot)
+        await interaction.response.send_message(f"Session timer has been reset to the default: {format_time(bot.session_time_remaining)}.", ephemeral=True)
+        bot.request_status_update()
 
 # --- Cog Setup --- #
 
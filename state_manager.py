@@ -2,7 +2,26 @@ import os
 import json
 import logging
 import tempfile
-import shutil
+import threading
+
+# orjson is an optional speedup (see the "speedups" extra), as in utils/serialization.py. It's imported
+# directly here because utils imports this module. The state file is only ever written by the bot,
+# so it's stored compact rather than pretty-printed.
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+if orjson is not None:
+    def _encode_state(state: dict) -> bytes:
+        return orjson.dumps(state)
+
+    _decode_state = orjson.loads
+else:
+    def _encode_state(state: dict) -> bytes:
+        return json.dumps(state, separators=(',', ':')).encode()
+
+    _decode_state = json.loads
 
 # Try to get SESSION_FILE path relative to this file's location if utils isn't importable directly
 try:
@@ -13,34 +32,55 @@ except ImportError:
     SESSION_FILE = os.path.join(_utils_dir, "session.json")
 
 
+# Every persisted key with its default; default_session_time comes from the StateManager instead
+_DEFAULT_STATE = {
+    'session_time_remaining': 0,
+    'last_session_update': None,
+    'session_pump_start': None,
+    'pump_last_on_time': 0,
+    'pump_total_on_time': 0,
+    'pump_state': False,
+    'default_session_time': None,
+    'banked_time': 0,
+    'latch_active': False,
+    'latch_end_time': None,
+    'latch_reason': None,
+    'pump_intensity': 1.0, # Add pump intensity state
+}
+
+_MISSING = object()  # getattr default that no bot attribute can be equal to
+
+
 class StateManager:
     """Manages loading and atomic saving of bot state to a JSON file."""
-    def __init__(self, file_path: str = SESSION_FILE, default_initial_time: int = 1800):
+
+    _STATE_KEYS = tuple(_DEFAULT_STATE)  # Bot attributes synced into the state on save
+
+    def __init__(self, file_path: str = SESSION_FILE, default_initial_time: int = 1800, fsync: bool = False):
         self.file_path = file_path
+        # Routine saves rely on the atomic rename alone; fsync makes them survive power loss too, at a cost per save
+        self.fsync = fsync
         self.logger = logging.getLogger(__name__)
         self.default_initial_time = default_initial_time
+        # Writes may happen off the event loop; these keep an older snapshot from overwriting a newer one
+        self._save_lock = threading.Lock()
+        self._version = 0
+        self._saved_version = 0
+        self._last_payload: bytes | None = None  # Last JSON written, so unchanged state isn't rewritten
+        self._last_synced = False  # Whether that write was fsynced
         # Initialize state with defaults, including latch state
-        self.state = {
-            'session_time_remaining': 0,
-            'last_session_update': None,
-            'session_pump_start': None,
-            'pump_last_on_time': 0,
-            'pump_total_on_time': 0,
-            'pump_state': False,
-            'default_session_time': default_initial_time,
-            'banked_time': 0,
-            'latch_active': False,
-            'latch_end_time': None,
-            'latch_reason': None,
-            'pump_intensity': 1.0, # Add pump intensity state
-        }
+        self.state = self._default_state()
         self.load_state()
 
+    def _default_state(self) -> dict:
+        """Returns a fresh state dictionary with every persisted key at its default."""
+        return _DEFAULT_STATE | {'default_session_time': self.default_initial_time}
+
     def load_state(self):
         """Load state from JSON file. If file doesn't exist or is invalid, initialize with defaults."""
         try:
-            with open(self.file_path, 'r') as f:
-                data = json.load(f)
+            with open(self.file_path, 'rb') as f:
+                data = _decode_state(f.read())
                 # Update default state with loaded data, ensuring all keys exist
                 self.state.update(data)
                 self.logger.info(f"Loaded state from {self.file_path}")
@@ -51,20 +91,7 @@ class StateManager:
         except (IOError, json.JSONDecodeError) as e:
             self.logger.error(f"Error loading state from {self.file_path}: {e}. Using default state.")
             # Reset to defaults if loading failed, but don't overwrite potentially recoverable file yet
-            self.state = {
-                'session_time_remaining': 0,
-                'last_session_update': None,
-                'session_pump_start': None,
-                'pump_last_on_time': 0,
-                'pump_total_on_time': 0,
-                'pump_state': False,
-                'default_session_time': self.default_initial_time,
-                'banked_time': 0,
-                'latch_active': False,
-                'latch_end_time': None,
-                'latch_reason': None,
-                'pump_intensity': 1.0, # Add pump intensity state
-            }
+            self.state = self._default_state()
         # Ensure default_session_time is correctly set even if loaded from file
         if 'default_session_time' not in self.state or self.state['default_session_time'] is None:
              self.state['default_session_time'] = self.default_initial_time
@@ -72,17 +99,54 @@ class StateManager:
         if 'pump_intensity' not in self.state or not isinstance(self.state['pump_intensity'], (int, float)) or not (0.0 <= self.state['pump_intensity'] <= 1.0):
             self.state['pump_intensity'] = 1.0 # Default to 1.0 if invalid or missing
 
-    def save_state(self):
+    def save_state(self, fsync: bool | None = None):
         """Atomically save the current state dictionary to the JSON file."""
+        self._version += 1
+        self.write_snapshot(self._version, dict(self.state), fsync)
+
+    def snapshot(self, bot_instance) -> tuple[int, dict]:
+        """Syncs state from the bot and returns a versioned copy for `write_snapshot`."""
+        self.update_from_bot(bot_instance)
+        self._version += 1
+        return self._version, dict(self.state)
+
+    def write_snapshot(self, version: int, state: dict, fsync: bool | None = None):
+        """Atomically writes a snapshot, unless a newer one has already been written. Safe to call from a thread.
+
+        `fsync` overrides the manager's setting for this write.
+        """
+        with self._save_lock:
+            if version <= self._saved_version:
+                return
+            self._write(state, self.fsync if fsync is None else fsync)
+            self._saved_version = version
+
+    def _write(self, state: dict, fsync: bool):
         temp_dir = os.path.dirname(self.file_path)
         try:
-            # Create a temporary file in the same directory
-            with tempfile.NamedTemporaryFile('w', dir=temp_dir, delete=False) as temp_f:
-                json.dump(self.state, temp_f, indent=4)
-                temp_path = temp_f.name # Get the path before closing
+            # Encode before touching the disk, so an unserializable value can't leave a temp file behind
+            payload = _encode_state(state)
+            if payload == self._last_payload and (self._last_synced or not fsync):
+                return  # Nothing changed since the last write, which was at least as durable
+            # Create a temporary file in the same directory. The payload is already bytes,
+            # so write it straight to the descriptor rather than through a file object
+            fd, temp_path = tempfile.mkstemp(dir=temp_dir)
+            try:
+                view = memoryview(payload)
+                while view:
+                    view = view[os.write(fd, view):]  # os.write may write less than it was given
+                if fsync:
+                    os.fsync(fd)  # Make sure the data is on disk before it replaces the old file
+            finally:
+                os.close(fd)
 
-            # Replace the original file with the temporary file
-            shutil.move(temp_path, self.file_path) # os.replace might fail across filesystems, shutil.move is safer
+            # Replace the original file with the temporary file. Both are in the same
+            # directory, so this is an atomic rename rather than a copy
+            os.replace(temp_path, self.file_path)
+            if fsync:
+                self._sync_dir(temp_dir)
+            self._last_payload = payload
+            self._last_synced = fsync
             self.logger.debug(f"Saved state atomically to {self.file_path}")
         except IOError as e:
             self.logger.error(f"Failed to save state to {self.file_path}: {e}")
@@ -101,16 +165,39 @@ class StateManager:
                     self.logger.error(f"Failed to remove temporary state file {temp_path}: {remove_err}")
 
 
-    def update_and_save(self, bot_instance):
-        """Update the state dictionary from bot attributes and save atomically."""
+    @staticmethod
+    def _sync_dir(path: str):
+        """Flushes a directory entry (e.g. a rename) to disk, where the platform supports it."""
+        try:
+            dir_fd = os.open(path or '.', os.O_RDONLY)
+        except OSError:
+            return  # Directories can't be opened on Windows; the rename is still atomic there
+        try:
+            os.fsync(dir_fd)
+        except OSError:
+            pass
+        finally:
+            os.close(dir_fd)
+
+    def update_from_bot(self, bot_instance):
+        """Update the state dictionary from bot attributes."""
         # Sync bot attributes to state manager's state dictionary
-        for key in self.state.keys():
-            if hasattr(bot_instance, key):
-                self.state[key] = getattr(bot_instance, key)
+        state = self.state
+        for key in self._STATE_KEYS:
+            value = getattr(bot_instance, key, _MISSING)
+            if value is not _MISSING:
+                state[key] = value
             else:
                 # This case should ideally not happen if bot attributes are kept in sync
-                self.logger.warning(f"Attribute '{key}' not found on bot instance during state update.")
-        self.save_state()
+                self.logger.warning("Attribute '%s' not found on bot instance during state update.", key)
+
+    def update_and_save(self, bot_instance):
+        """Update the state dictionary from bot attributes and save atomically.
+
+        Used for the final save at shutdown, so this write is always fsynced.
+        """
+        self.update_from_bot(bot_instance)
+        self.save_state(fsync=True)
 
     def apply_to_bot(self, bot_instance):
          """Apply the loaded state to the bot instance's attributes."""
@@ -0,0 +1,65 @@
+import asyncio
+import types
+import unittest
+from unittest import mock
+
+from cogs import pump
+
+
+def make_bot(**overrides):
+    bot = types.SimpleNamespace(
+        pump_interrupt_event=asyncio.Event(), latch_active=False, service_was_up=True,
+        banked_time=0, session_time_remaining=100, max_banked_time=3600, max_pump_duration=60,
+        pump_task=None, pump_task_end_time=None, pump_active=False, pump_stopping=False,
+        banked_run_start=None, pump_intensity=1.0, last_pump_time=None,
+        session_debit_start=None, session_expiry_handle=None, request_status_update=lambda: None,
+    )
+    vars(bot).update(overrides)
+    return bot
+
+
+def make_interaction():
+    interaction = mock.MagicMock()
+    interaction.response.send_message = mock.AsyncMock()
+    interaction.response.defer = mock.AsyncMock()
+    interaction.followup.send = mock.AsyncMock()
+    return interaction
+
+
+class InflateDuringCleanupTest(unittest.IsolatedAsyncioTestCase):
+    async def test_inflate_while_cleanup_waits_on_the_device(self):
+        bot = make_bot()
+        pump_off_requested = asyncio.Event()
+        release_pump_off = asyncio.Event()
+
+        async def set_api_pump_state(bot, level):
+            if level == 0.0:
+                pump_off_requested.set()
+                await release_pump_off.wait()  # Hold cleanup on the pump-off request
+            return True
+
+        with mock.patch.object(pump, "set_api_pump_state", set_api_pump_state), \
+                mock.patch.object(pump, "save_session_state_async", mock.AsyncMock()), \
+                mock.patch.object(pump, "mark_session_dirty", lambda bot: None):
+            bot.pump_task_end_time = asyncio.get_running_loop().time() + 0.05
+            pump._start_pump_task(bot, pump._pump_loop(bot, banked=False), "pump_timed")
+            task = bot.pump_task
+            await asyncio.wait_for(pump_off_requested.wait(), timeout=1)
+
+            interaction = make_interaction()
+            await pump._start_timed_pump(bot, interaction, 10)
+
+            interaction.response.send_message.assert_awaited_once()
+            self.assertIn("stopping", interaction.response.send_message.await_args.args[0])
+            self.assertTrue(bot.pump_active)
+
+            release_pump_off.set()
+            await asyncio.wait({task})
+
+        self.assertFalse(bot.pump_active)
+        self.assertFalse(bot.pump_stopping)
+        self.assertIsNone(bot.pump_task_end_time)
+
+
+if __name__ == "__main__":
+    unittest.main()
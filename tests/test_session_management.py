@@ -0,0 +1,49 @@
+import asyncio
+import types
+import unittest
+from unittest import mock
+
+from utils import session_management
+
+
+def make_bot(session_time_remaining):
+    return types.SimpleNamespace(
+        session_time_remaining=session_time_remaining, session_debit_start=None, session_expiry_handle=None,
+        pump_interrupt_event=asyncio.Event(), request_status_update=lambda: None,
+    )
+
+
+class SessionExpiryTest(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.set_pump = mock.AsyncMock(return_value=True)
+        patcher = mock.patch.object(session_management, "set_api_pump_state", self.set_pump)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    async def test_pump_on_without_session_time_is_switched_off(self):
+        bot = make_bot(0)
+        session_management.start_session_debit(bot)
+        await asyncio.sleep(0)  # Let the pump-off task run
+        self.set_pump.assert_awaited_once_with(bot, 0.0)
+        self.assertIsNone(bot.session_debit_start)
+
+    async def test_session_cut_to_zero_switches_the_pump_off(self):
+        bot = make_bot(600)
+        session_management.start_session_debit(bot)
+        bot.session_time_remaining = 0  # e.g. /session rem
+        session_management.notify_budget_changed(bot)
+        await asyncio.sleep(0)
+        self.set_pump.assert_awaited_once_with(bot, 0.0)
+
+    async def test_added_session_time_pushes_back_the_expiry(self):
+        bot = make_bot(1)
+        session_management.start_session_debit(bot)
+        bot.session_time_remaining = 600  # e.g. /session add
+        session_management.notify_budget_changed(bot)
+        await asyncio.sleep(1.2)
+        self.set_pump.assert_not_awaited()
+        session_management.stop_session_debit(bot)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,18 +1,34 @@
 # discord_bot/utils/__init__.py
 from .time_formatting import format_time
-from .state_persistence import save_wearer_id, save_session_state, load_session_state
-from .session_management import update_session_time, start_pump_timer
+from .state_persistence import save_wearer_id, save_session_state, save_session_state_async, mark_session_dirty, flush_session_state, load_session_state
+from .session_management import (
+    update_session_time, add_banked_time, notify_budget_changed, banked_time_left, start_pump_timer,
+    start_session_debit, settle_session_debit, stop_session_debit
+)
 from .latch_management import auto_unlatch, toggle_latch, set_latch_reason
-from .permissions import is_wearer, notify_wearer, dm_wearer_on_use, check_is_wearer, check_is_privileged
-from .api import api_request, get_api_pump_state
+from .permissions import is_wearer, notify_wearer, queue_wearer_dm, get_wearer, dm_wearer_on_use, check_is_wearer, check_is_privileged
+from .api import (
+    HTTP_TIMEOUT, api_request, cached_api, cache_api_result, get_api_pump_state, set_api_pump_state,
+    record_pump_state, known_pump_state
+)
+from .status import marco_probe, build_status_embed
 
 __all__ = [
     'format_time',
     'save_wearer_id',
     'save_session_state',
+    'save_session_state_async',
+    'mark_session_dirty',
+    'flush_session_state',
     'load_session_state',
     'update_session_time',
+    'add_banked_time',
+    'notify_budget_changed',
+    'banked_time_left',
     'start_pump_timer',
+    'start_session_debit',
+    'settle_session_debit',
+    'stop_session_debit',
     'auto_unlatch',
     'toggle_latch',
     'set_latch_reason',
@@ -20,7 +36,17 @@ __all__ = [
     'check_is_wearer',
     'check_is_privileged',
     'notify_wearer',
+    'queue_wearer_dm',
+    'get_wearer',
     'dm_wearer_on_use',
+    'HTTP_TIMEOUT',
     'api_request',
+    'cached_api',
+    'cache_api_result',
     'get_api_pump_state',
+    'set_api_pump_state',
+    'record_pump_state',
+    'known_pump_state',
+    'marco_probe',
+    'build_status_embed',
 ]
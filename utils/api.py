@@ -1,109 +1,153 @@
 import asyncio
 import json
 import logging
+import time
 import aiohttp
 from typing import TYPE_CHECKING, Optional
 
+from .serialization import json_loads
+
 # Added TYPE_CHECKING block for Bot hint
 if TYPE_CHECKING:
     from bot import lBISBot
 
 logger = logging.getLogger(__name__)
 
+# Bound connecting and reading separately, so a dead device fails fast instead of using the whole budget
+HTTP_TIMEOUT = aiohttp.ClientTimeout(total=5, connect=2, sock_read=3)
+
 # --- API Interaction ---
 
-async def api_request(bot: 'lBISBot', endpoint: str, method: str = "GET", data: dict = None, timeout: int = 5) -> dict | None:
+async def api_request(bot: 'lBISBot', endpoint: str, method: str = "GET", data: dict = None, timeout: float | None = None, raw: bool = False) -> dict | str | None:
     """
     Make a request to the lBIS API.
 
     Args:
-        bot: The bot instance containing API_BASE_URL
+        bot: The bot instance holding the shared http_session
         endpoint: API endpoint (without leading slash)
         method: HTTP method (GET/POST)
         data: Optional data to send with request
-        timeout: Request timeout in seconds
+        timeout: Request timeout in seconds; defaults to the session's HTTP_TIMEOUT
+        raw: Return the response body as text, without trying to parse it
 
     Returns:
-        Response data as dict if successful and response has data
+        Response data as dict if successful and response has data (the body text if `raw`)
         None if request failed or had no data
     """
-    url = f"{bot.API_BASE_URL}/api/{endpoint}"
+    url = f"/api/{endpoint}"  # Resolved against the session's base_url
     try:
-        async with aiohttp.ClientSession() as session:
-            kwargs = {
-                'timeout': timeout
-            }
-            if data:
-                kwargs['json'] = data
-
-            async with getattr(session, method.lower())(url, **kwargs) as resp:
-                if resp.status != 200:
-                    logger.warning(f"API request to {endpoint} failed with status {resp.status}")
-                    return None
+        # Use the bot-wide session so requests reuse pooled keep-alive connections
+        session = bot.http_session
+        kwargs = {}
+        if timeout is not None:
+            # The session already applies HTTP_TIMEOUT, so only build a timeout for an override
+            kwargs['timeout'] = aiohttp.ClientTimeout(total=timeout, connect=HTTP_TIMEOUT.connect, sock_read=HTTP_TIMEOUT.sock_read)
+        if data:
+            kwargs['json'] = data
+        method = method.upper()
+        if method != "GET":
+            bot._api_cache.clear()  # Anything cached may be stale once the device state changes
+
+        async with session.request(method, url, **kwargs) as resp:
+            if resp.status != 200:
+                logger.warning("API request to %s failed with status %s", endpoint, resp.status)
+                return None
+
+            if raw:
+                return await resp.text()
 
+            # Most endpoints (getPumpState included) answer in plain text, so check the
+            # content type up front instead of letting resp.json() raise on every call
+            if resp.content_type == 'application/json':
                 try:
-                    return await resp.json()
-                except (json.JSONDecodeError, aiohttp.ContentTypeError):
-                    # For endpoints that return plain text
-                    text = await resp.text()
-                    try:
-                        # Try to handle numeric responses
-                        return {"value": int(text)}
-                    except ValueError:
-                        return {"message": text}
+                    return await resp.json(loads=json_loads)
+                except json.JSONDecodeError:
+                    pass
+            # For endpoints that return plain text
+            text = await resp.text()
+            try:
+                # Try to handle numeric responses
+                return {"value": int(text)}
+            except ValueError:
+                return {"message": text}
 
     except asyncio.TimeoutError:
-        logger.warning(f"API request to {endpoint} timed out after {timeout}s")
+        logger.warning("API request to %s timed out after %ss", endpoint, timeout or HTTP_TIMEOUT.total)
     except Exception as e:
-        logger.error(f"API request to {endpoint} failed with error: {e}")
+        logger.error("API request to %s failed with error: %s", endpoint, e)
 
     return None
 
+def cache_api_result(bot: 'lBISBot', endpoint: str, value: dict | None):
+    """Stores a result for `endpoint` so `cached_api` can serve it without another request."""
+    bot._api_cache[endpoint] = (time.monotonic(), value)
+
+async def cached_api(bot: 'lBISBot', endpoint: str, ttl: float = 3.0) -> dict | None:
+    """GETs `endpoint` like `api_request`, reusing any result fetched in the last `ttl` seconds."""
+    cached = bot._api_cache.get(endpoint)
+    if cached is not None and time.monotonic() - cached[0] < ttl:
+        return cached[1]
+    value = await api_request(bot, endpoint)
+    cache_api_result(bot, endpoint, value)
+    return value
+
+def record_pump_state(bot: 'lBISBot', level: float):
+    """Remembers the pump's last known duty cycle, so readers can skip asking the device."""
+    bot.current_pump_state = level
+    bot.pump_state_updated = time.monotonic()
+
+def known_pump_state(bot: 'lBISBot', max_age: float) -> Optional[float]:
+    """Returns the last known duty cycle if it was seen in the last `max_age` seconds, else None."""
+    if bot.current_pump_state is None or time.monotonic() - bot.pump_state_updated > max_age:
+        return None
+    return bot.current_pump_state
+
+async def set_api_pump_state(bot: 'lBISBot', level: float) -> bool:
+    """Sets the pump's duty cycle through the API, recording it on success."""
+    if await api_request(bot, "setPumpState", method="POST", data={"pump": level}) is None:
+        return False
+    record_pump_state(bot, level)
+    return True
+
 async def get_api_pump_state(bot: 'lBISBot') -> Optional[bool]:
     """Queries the API for the current pump state (PWM value).
 
+    Concurrent callers share a single request; pair with `known_pump_state` to skip it entirely.
+
     Args:
         bot: The bot instance.
 
     Returns:
         True if the pump duty cycle > 0, False if 0, None if state is unknown or API fails.
     """
+    probe = bot._pump_state_probe
+    if probe is None or probe.done():
+        probe = bot._pump_state_probe = asyncio.create_task(_probe_pump_state(bot), name="pump_state_probe")
+    # Shielded so one caller being cancelled doesn't cancel the request for the others
+    return await asyncio.shield(probe)
+
+async def _probe_pump_state(bot: 'lBISBot') -> Optional[bool]:
     if not bot.device_base_url:
         logger.error("Device API base URL not configured. Cannot get pump status.")
         return None
 
     try:
-        # Use the existing api_request helper
-        response_data = await api_request(bot, "getPumpState", method="GET")
+        # The device answers with the duty cycle as plain text, e.g. "0.00" or "0.50"
+        text_value = await api_request(bot, "getPumpState", method="GET", raw=True)
 
-        if response_data is None:
+        if text_value is None:
             logger.warning("get_api_pump_state: API request returned None")
             return None
 
-        # Handle potential text response first (API returns float string like "0.00", "0.50")
-        if 'message' in response_data:
-            text_value = response_data['message']
-            try:
-                # Parse as float and check if > 0
-                return float(text_value) > 0.0
-            except (ValueError, TypeError):
-                logger.error(f"get_api_pump_state: Could not parse text response '{text_value}' as float.")
-                return None
-        # Handle potential numeric response (from api_request parsing - less likely now)
-        elif 'value' in response_data:
-             try:
-                 # Check if numeric value > 0
-                return float(response_data['value']) > 0.0
-             except (ValueError, TypeError):
-                logger.error(f"get_api_pump_state: Could not parse numeric value '{response_data['value']}' as float.")
-                return None
-        # Handle potential JSON response as fallback (unlikely for this endpoint now)
-        elif 'is_on' in response_data: # Keep for potential future API changes
-            return bool(response_data.get('is_on'))
-        else:
-            logger.error(f"get_api_pump_state: Unexpected API response format: {response_data}")
+        try:
+            level = float(text_value)
+        except ValueError:
+            logger.error("get_api_pump_state: Could not parse response '%s' as float.", text_value)
             return None
 
+        record_pump_state(bot, level)
+        return level > 0.0
+
     except Exception as e:
-        logger.error(f"get_api_pump_state: Failed to check pump status: {e}")
+        logger.error("get_api_pump_state: Failed to check pump status: %s", e)
         return None
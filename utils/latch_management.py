@@ -1,7 +1,9 @@
 import asyncio
-import aiohttp  # Added aiohttp
 import logging  # Added logging
-from .state_persistence import save_session_state
+from .state_persistence import save_session_state_async, mark_session_dirty
+from .session_management import stop_session_debit
+from .permissions import get_wearer
+from .api import HTTP_TIMEOUT, record_pump_state
 
 logger = logging.getLogger(__name__)  # Added logger
 
@@ -17,30 +19,34 @@ async def toggle_latch(bot, new_state: bool, reason: str = None, duration: int =
 
     bot.latch_active = new_state
     bot.latch_reason = reason if new_state else None  # Set reason only if latching
+    if new_state:
+        bot.pump_interrupt_event.set()  # Wake any running pump task so it stops right away
     status_message = "latched" if new_state else "unlatched"
     warning_message = ""
 
     # If latching, ensure pump is off
     if new_state:
-        async with aiohttp.ClientSession() as session:
-            try:
-                async with session.post(
-                    f"{bot.API_BASE_URL}/api/setPumpState",
-                    json={"pump": 0},
-                    timeout=10
-                ) as response:
-                    if response.status != 200:
-                        warning_message = f"Warning: Failed to turn pump off while latching (Server status: {response.status}). Latch applied anyway."
-                        logger.warning(f"Failed to turn pump off via API during latch ON: Status {response.status}")
-                    # else: Pump turned off successfully
-            except Exception as e:
-                warning_message = f"Warning: Error contacting server to turn pump off while latching: {e}. Latch applied anyway."
-                logger.error(f"Error turning pump off via API during latch ON: {e}")
-                # Continue latching
+        try:
+            # Use the shared session so the pump-off rides an already-open connection
+            async with bot.http_session.post(
+                "/api/setPumpState",
+                json={"pump": 0},
+                timeout=HTTP_TIMEOUT
+            ) as response:
+                if response.status == 200:
+                    record_pump_state(bot, 0.0)
+                    stop_session_debit(bot)  # Pump is off now
+                else:
+                    warning_message = f"Warning: Failed to turn pump off while latching (Server status: {response.status}). Latch applied anyway."
+                    logger.warning(f"Failed to turn pump off via API during latch ON: Status {response.status}")
+        except Exception as e:
+            warning_message = f"Warning: Error contacting server to turn pump off while latching: {e}. Latch applied anyway."
+            logger.error(f"Error turning pump off via API during latch ON: {e}")
+            # Continue latching
 
         # Set up timed unlatch if duration specified
         if duration is not None and duration > 0:
-            bot.latch_end_time = asyncio.get_event_loop().time() + duration
+            bot.latch_end_time = asyncio.get_running_loop().time() + duration
             bot.latch_timer = asyncio.create_task(auto_unlatch(bot, duration))
             status_message = f"{status_message} for {duration // 60} minutes"
             if reason:
@@ -52,7 +58,10 @@ async def toggle_latch(bot, new_state: bool, reason: str = None, duration: int =
         bot.latch_end_time = None  # Clear end time when unlatching manually
         bot.latch_reason = None  # Clear reason when unlatching
 
-    save_session_state(bot)
+    if new_state:
+        await save_session_state_async(bot)  # A latch must survive a crash, so write it out now
+    else:
+        mark_session_dirty(bot)  # Losing an unlatch only leaves the pump latched, so let it coalesce
     final_message = f"Pump is now {status_message}."
     if warning_message:
         final_message = f"{warning_message} {final_message}"
@@ -65,7 +74,7 @@ async def set_latch_reason(bot, reason: str = None) -> tuple[bool, str]:
         return False, "Cannot set reason: Latch is not currently active."
 
     bot.latch_reason = reason
-    save_session_state(bot)
+    mark_session_dirty(bot)
     if reason:
         return True, f"Latch reason set to: {reason}"
     else:
@@ -73,19 +82,23 @@ async def set_latch_reason(bot, reason: str = None) -> tuple[bool, str]:
 
 async def auto_unlatch(bot, delay):
     """Automatically unlatch after specified delay"""
-    await asyncio.sleep(delay)
+    try:
+        await asyncio.wait_for(bot._shutdown_event.wait(), timeout=delay)
+        return  # Shutting down; leave the saved latch state untouched
+    except asyncio.TimeoutError:
+        pass
     if bot.latch_timer:  # Check if it wasn't cancelled
         bot.latch_active = False
         bot.latch_timer = None
         bot.latch_end_time = None
         bot.latch_reason = None  # Clear reason on auto-unlatch
-        save_session_state(bot)  # Use the imported function
+        mark_session_dirty(bot)
         logger.info("Timed latch expired.")  # Use logger
-        if bot.config.get('wearer_id'):  # Check config for wearer_id
+        # Trigger status update after state change using the bot method
+        bot.request_status_update()
+        if bot.config['wearer_id']:  # Check config for wearer_id
             try:
-                wearer = await bot.fetch_user(bot.config['wearer_id'])
+                wearer = await get_wearer(bot)
                 await wearer.send("Timed latch has expired - pump is now unlatched.")
-                # Trigger status update after state change using the bot method
-                await bot.request_status_update()
             except Exception as e:
                 logger.error(f"Failed to notify wearer of auto-unlatch: {e}")  # Use logger
@@ -2,7 +2,7 @@ import discord
 import asyncio
 import functools
 import logging
-from discord.ext import commands
+from discord import app_commands
 
 logger = logging.getLogger(__name__)
 
@@ -10,27 +10,17 @@ logger = logging.getLogger(__name__)
 
 # Placeholder for future, more complex permission logic
 # For now, "privileged" is the same as being the wearer.
+# The predicates are plain functions: discord.py runs sync checks without scheduling a coroutine.
+# They compare against bot.OWNER_ID, which save_wearer_id keeps in step with the config.
 def is_privileged():
-    async def predicate(interaction: discord.Interaction) -> bool:
-        # Ensure bot and config are accessible
-        bot = interaction.client
-        if not hasattr(bot, 'config') or 'wearer_id' not in bot.config:
-            # Handle missing config gracefully (log error, deny permission)
-            print("Error: Bot config or wearer_id not found for permission check.") # Replace with proper logging
-            return False
-        return interaction.user.id == bot.config.get('wearer_id')
-    return commands.check(predicate)
+    def predicate(interaction: discord.Interaction) -> bool:
+        return interaction.user.id == interaction.client.OWNER_ID
+    return app_commands.check(predicate)
 
 def is_wearer():
-    async def predicate(interaction: discord.Interaction) -> bool:
-        # Ensure bot and config are accessible
-        bot = interaction.client
-        if not hasattr(bot, 'config') or 'wearer_id' not in bot.config:
-             # Handle missing config gracefully (log error, deny permission)
-            print("Error: Bot config or wearer_id not found for permission check.") # Replace with proper logging
-            return False
-        return interaction.user.id == bot.config.get('wearer_id')
-    return commands.check(predicate)
+    def predicate(interaction: discord.Interaction) -> bool:
+        return interaction.user.id == interaction.client.OWNER_ID
+    return app_commands.check(predicate)
 
 # Decorator to check if the user is the wearer
 def check_is_wearer():
@@ -40,28 +30,39 @@ def check_is_wearer():
 def check_is_privileged():
     return is_privileged()
 
+async def get_wearer(bot) -> discord.User | None:
+    """Returns the wearer's User, only asking Discord's API when it isn't already cached."""
+    wearer_id = bot.config['wearer_id']
+    if not wearer_id:
+        return None
+    cached = bot._wearer_user
+    if cached is not None and cached.id == wearer_id:
+        return cached
+    user = bot.get_user(wearer_id) or await bot.fetch_user(wearer_id)
+    bot._wearer_user = user
+    return user
+
+def queue_wearer_dm(bot, message: str):
+    """Queues a DM to the wearer without waiting for it; MonitorCog delivers it in the background."""
+    try:
+        bot.wearer_outbox.put_nowait(message)
+    except asyncio.QueueFull:
+        logger.warning(f"Wearer DM outbox is full, dropping message: {message}")
+
 async def notify_wearer(bot, interaction: discord.Interaction, command_name: str):
-    if not hasattr(bot, 'config') or 'wearer_id' not in bot.config or interaction.user.id == bot.config.get('wearer_id'):
+    wearer_id = bot.config['wearer_id'] if hasattr(bot, 'config') else None
+    if not wearer_id or interaction.user.id == wearer_id:
         return  # Don't notify if no wearer set or if wearer uses command
 
-    try:
-        wearer = await bot.fetch_user(bot.config.get('wearer_id'))
-        if wearer:
-            location = "Direct Messages" if interaction.guild is None else f"{interaction.guild.name} / #{interaction.channel.name}"
-            user_info = f"{interaction.user} ({interaction.user.id})"
-
-            # Get command parameters
-            params = []
-            if interaction.data and "options" in interaction.data:
-                for option in interaction.data.get("options", []):
-                    params.append(f"{option['name']}:{option['value']}")
-            param_str = " " + " ".join(params) if params else ""
-
-            await wearer.send(
-                f"Command `{command_name}{param_str}` used by {user_info} in {location}."
-            )
-    except Exception as e:
-        logger.error(f"Failed to notify wearer for command '{command_name}': {e}")
+    location = "Direct Messages" if interaction.guild is None else f"{interaction.guild.name} / #{interaction.channel.name}"
+    user_info = f"{interaction.user} ({interaction.user.id})"
+
+    # Get command parameters from the namespace discord.py has already parsed (and un-nested
+    # from any subcommand); unset optional parameters show up there as None
+    param_str = "".join(f" {name}:{value}" for name, value in interaction.namespace if value is not None)
+
+    # Queue rather than send so the command itself doesn't wait on fetch_user + DM round-trips
+    queue_wearer_dm(bot, f"Command `{command_name}{param_str}` used by {user_info} in {location}.")
 
 def dm_wearer_on_use(command_name):
     """Decorator to notify the wearer when a command is used.
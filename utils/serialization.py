@@ -0,0 +1,20 @@
+import json
+
+# --- JSON Serialization ---
+
+# orjson is an optional speedup (see the "speedups" extra); fall back to the stdlib when it's missing.
+# orjson.JSONDecodeError subclasses json.JSONDecodeError, so callers can keep catching the stdlib error.
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+if orjson is not None:
+    json_loads = orjson.loads
+
+    def json_dumps(obj) -> str:
+        # aiohttp's json_serialize hook expects str, while orjson produces bytes
+        return orjson.dumps(obj).decode()
+else:
+    json_loads = json.loads
+    json_dumps = json.dumps
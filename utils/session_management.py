@@ -1,6 +1,8 @@
 import asyncio
 import logging
+import time
 from discord.ext import commands
+from .api import set_api_pump_state
 
 logger = logging.getLogger(__name__)
 
@@ -9,20 +11,105 @@ logger = logging.getLogger(__name__)
 def update_session_time(bot: commands.Bot, delta_seconds: int):
     """Updates the session time remaining, ensuring it stays within bounds."""
     # We don't apply max_session_time cap here directly.
-    # Commands adding time (/add_time) should enforce the cap.
+    # Commands adding time (/session add) should enforce the cap.
     # This function just handles decrementing or applying changes from pump runs.
     new_time = bot.session_time_remaining + delta_seconds
 
     # Prevent session time from going below zero
-    bot.session_time_remaining = max(0, new_time)
+    if new_time < 0:
+        new_time = 0
+    bot.session_time_remaining = new_time
 
     # Log the change
     if delta_seconds != 0:
-        logger.debug(f"Session time updated by {delta_seconds}s. New time: {bot.session_time_remaining}s")
+        logger.debug("Session time updated by %ss. New time: %ss", delta_seconds, new_time)
 
     # Note: State saving is handled by the calling function (e.g., end of pump loop)
 
+def add_banked_time(bot: commands.Bot, seconds: int) -> int:
+    """Adds time to the bank, capped at max_banked_time, and returns how much was actually added.
+
+    Every deposit goes through here so the cap is applied in one place. There is no await
+    between the read and the write, so concurrent commands can't interleave with it.
+    """
+    old_banked = bot.banked_time
+    bot.banked_time = min(old_banked + int(seconds), bot.max_banked_time)
+    return bot.banked_time - old_banked
+
+def notify_budget_changed(bot: commands.Bot):
+    """Call after the bank or session time was changed by hand.
+
+    A running banked pump is only charged when it ends, so it wakes up and re-checks how much
+    time it may still use. A manually running pump has its session expiry re-armed for the new
+    session time, or is switched off if none is left.
+    """
+    bot.pump_interrupt_event.set()
+    _schedule_session_expiry(bot)
+
+def banked_time_left(bot: commands.Bot) -> int:
+    """Returns the banked time, less what a running banked pump has used but not been charged for yet."""
+    if bot.banked_run_start is None:
+        return bot.banked_time
+    used = int(asyncio.get_running_loop().time() - bot.banked_run_start)
+    return max(0, bot.banked_time - used)
+
+# --- Manual Pump Session Debit ---
+# Pump tasks charge session time themselves. When the pump runs outside a task (/pump on,
+# or switched on at the device), session time is charged from a start timestamp instead of
+# ticking once a second: the elapsed time is folded in whenever someone reads the session,
+# and a single timer fires when it would reach zero.
+
+def start_session_debit(bot: commands.Bot):
+    """Starts charging session time for a pump that is running outside a pump task."""
+    if bot.session_debit_start is not None:
+        return  # Already charging
+    bot.session_debit_start = time.monotonic()
+    _schedule_session_expiry(bot)
+
+def settle_session_debit(bot: commands.Bot):
+    """Folds the session time used since the last settle into session_time_remaining."""
+    if bot.session_debit_start is None:
+        return
+    elapsed = int(time.monotonic() - bot.session_debit_start)
+    if elapsed > 0:
+        update_session_time(bot, -elapsed)
+        bot.session_debit_start += elapsed  # Keep the fractional second for the next settle
+    _schedule_session_expiry(bot)
+
+def stop_session_debit(bot: commands.Bot):
+    """Settles and stops charging session time, e.g. once the manually started pump is off."""
+    settle_session_debit(bot)
+    bot.session_debit_start = None
+    if bot.session_expiry_handle:
+        bot.session_expiry_handle.cancel()
+        bot.session_expiry_handle = None
+
+def _schedule_session_expiry(bot: commands.Bot):
+    """(Re)arms the timer for the moment the charged session time runs out."""
+    if bot.session_expiry_handle:
+        bot.session_expiry_handle.cancel()
+        bot.session_expiry_handle = None
+    if bot.session_debit_start is None:
+        return
+    if bot.session_time_remaining <= 0:
+        _on_session_expired(bot)  # Already out of time; don't leave the pump running until a later settle
+        return
+    delay = bot.session_time_remaining - (time.monotonic() - bot.session_debit_start)
+    bot.session_expiry_handle = asyncio.get_running_loop().call_later(max(0.0, delay), _on_session_expired, bot)
+
+def _on_session_expired(bot: commands.Bot):
+    bot.session_expiry_handle = None
+    bot.session_time_remaining = 0
+    bot.session_debit_start = None
+    logger.info("Session time reached zero while pump was manually on, turning it off.")
+    asyncio.create_task(_force_pump_off(bot))
+
+async def _force_pump_off(bot: commands.Bot):
+    if not await set_api_pump_state(bot, 0.0):
+        logger.error("Failed to turn off the pump after the session ran out.")
+    bot.request_status_update()
+
 # TODO: Verify if this function is used or redundant.
 def start_pump_timer(bot): # this might be redundant? leave it for now Gemini
     """Start tracking pump run time"""
-    bot.session_pump_start = asyncio.get_event_loop().time()
+    bot.session_pump_start = time.monotonic()  # Same clock as session_debit_start
@@ -1,46 +1,90 @@
+import asyncio
 import json
 import os
 import logging
 from discord.ext import commands
 from state_manager import StateManager
+from .session_management import settle_session_debit
 
 # --- Constants ---
 _utils_dir = os.path.dirname(os.path.abspath(__file__))  # Get directory of this file within utils
 _base_dir = os.path.dirname(_utils_dir)  # Get the parent discord_bot directory
 SESSION_FILE = os.path.join(_base_dir, "session.json")  # Path relative to discord_bot dir
 BOT_CONFIG_FILE = os.path.join(_base_dir, "bot.json")  # Path relative to discord_bot dir
+SAVE_DEBOUNCE = 0.5  # Seconds to gather state changes before mark_session_dirty writes them
 logger = logging.getLogger(__name__)
 
 # --- Configuration & State Persistence ---
 
 def save_wearer_id(bot, wearer_id):
+    if bot.config['wearer_id'] == wearer_id and bot.OWNER_ID == wearer_id:
+        return  # Already the wearer; bot.json is up to date
     bot.config['wearer_id'] = wearer_id
-    with open(BOT_CONFIG_FILE, 'w') as config_file:
-        json.dump(bot.config, config_file, indent=4)
+    # Encode up front and write it in one go to a sibling file, then swap it in, so a crash
+    # mid-write can't leave bot.json (and the token in it) truncated
+    data = json.dumps(bot.config, indent=4)
+    temp_path = BOT_CONFIG_FILE + '.tmp'
+    with open(temp_path, 'w') as config_file:
+        config_file.write(data)
+        config_file.flush()
+        os.fsync(config_file.fileno())
+    os.replace(temp_path, BOT_CONFIG_FILE)
     bot.OWNER_ID = wearer_id  # Update runtime state
 
 def save_session_state(bot):
     """Updates the state manager with the bot's current state and saves it."""
+    settle_session_debit(bot)  # Persist session time used by a manually running pump so far
     if hasattr(bot, 'state_manager') and bot.state_manager:
+        # This write covers anything a pending debounced save would have written
+        bot._state_dirty = False
+        if bot._state_flush_handle:
+            bot._state_flush_handle.cancel()
+            bot._state_flush_handle = None
         bot.state_manager.update_and_save(bot)
     else:
         logger.error("Attempted to save state, but state_manager is not initialized.")
 
+async def save_session_state_async(bot):
+    """Like save_session_state, but writes the file in a worker thread."""
+    bot._state_dirty = True
+    await flush_session_state(bot)
+
+def mark_session_dirty(bot):
+    """Saves the bot's state shortly, coalescing a burst of changes into a single write.
+
+    The file is written in a worker thread, so the event loop never waits on disk I/O.
+    """
+    bot._state_dirty = True
+    if bot._state_flush_handle is None:
+        bot._state_flush_handle = asyncio.get_running_loop().call_later(SAVE_DEBOUNCE, _start_state_flush, bot)
+
+def _start_state_flush(bot):
+    bot._state_flush_handle = None
+    bot._state_flush_task = asyncio.create_task(flush_session_state(bot), name="session_state_flush")
+
+async def flush_session_state(bot):
+    """Writes the bot's state if it has changed since the last save."""
+    if not bot._state_dirty:
+        return
+    bot._state_dirty = False
+    if bot._state_flush_handle:
+        bot._state_flush_handle.cancel()  # This write covers the pending one
+        bot._state_flush_handle = None
+    settle_session_debit(bot)
+    # Snapshot on the loop thread so the worker never sees state mid-update
+    version, state = bot.state_manager.snapshot(bot)
+    await asyncio.to_thread(bot.state_manager.write_snapshot, version, state)
+
 def load_session_state(bot):
     """Initializes the StateManager and applies the loaded state to the bot."""
-    default_initial_time = bot.config.get('max_session_time', 1800)
+    default_initial_time = bot.config['max_session_time']
     # Create the state manager instance for the bot
-    bot.state_manager = StateManager(file_path=SESSION_FILE, default_initial_time=default_initial_time)
+    file_path = bot.config['session_file'] or SESSION_FILE  # bot.json may move the state file, e.g. onto a tmpfs
+    bot.state_manager = StateManager(file_path=file_path, default_initial_time=default_initial_time, fsync=bot.config['session_fsync'])
     bot.state_manager.apply_to_bot(bot)
 
-    # Initialize runtime-only attributes that are not persisted
-    # Ensure these are always present after loading state
-    if not hasattr(bot, 'latch_timer'):
-        bot.latch_timer = None
-    if not hasattr(bot, 'pump_task'):
-        bot.pump_task = None
-    if not hasattr(bot, 'pump_task_end_time'):
-        bot.pump_task_end_time = None
+    # Runtime-only attributes (latch_timer, pump_task, pump_task_end_time) are declared in lBISBot.__init__
+
     # session_pump_start is technically persisted but needs careful handling
     # If the bot restarts mid-pump, session_pump_start might be stale.
     # Consider resetting it or validating it on load if necessary.
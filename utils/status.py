@@ -0,0 +1,105 @@
+import asyncio
+import logging
+import discord
+from typing import TYPE_CHECKING
+
+from .api import HTTP_TIMEOUT, cached_api, cache_api_result, get_api_pump_state, known_pump_state
+from .session_management import settle_session_debit, banked_time_left
+from .time_formatting import format_time
+
+if TYPE_CHECKING:
+    from bot import lBISBot
+
+logger = logging.getLogger(__name__)
+
+MARCO_MAX_BODY = 1024  # The reply is a short word; don't buffer more than this from a misbehaving server
+_head_supported = True  # Cleared if the device rejects HEAD, after which probes fall back to GET
+PUMP_STATE_MAX_AGE = 30.0  # Trust a recorded pump state this long before asking the device again
+MARCO_CACHE_TTL = 20.0  # Covers the monitor's 15s probe interval, so /admin status can reuse its result
+
+# --- Status Reporting ---
+
+async def marco_probe(bot: 'lBISBot', head: bool = False) -> tuple[int, str]:
+    """Pings the lBIS API's /api/marco endpoint.
+
+    Args:
+        bot: The bot instance.
+        head: Only check the status with a HEAD request (body text is then empty).
+
+    Returns:
+        The response status and body text. A successful probe is also stored in the API
+        cache so `build_status_embed` can reuse it.
+
+    Raises:
+        asyncio.TimeoutError, aiohttp.ClientError: If the server can't be reached.
+    """
+    global _head_supported
+    head_status = None
+    if head and _head_supported:
+        async with bot.http_session.head("/api/marco", timeout=HTTP_TIMEOUT) as response:
+            head_status = response.status
+        if head_status == 200:
+            cache_api_result(bot, "marco", {"message": ""})
+            return head_status, ""
+        # Small servers may answer an unregistered method with any error status (404 included),
+        # so confirm with GET before reporting the service as down
+
+    async with bot.http_session.get("/api/marco", timeout=HTTP_TIMEOUT) as response:
+        body = await response.content.read(MARCO_MAX_BODY)
+        text = body.decode(response.get_encoding(), errors='replace')
+        if response.status == 200:
+            cache_api_result(bot, "marco", {"message": text})
+            if head_status is not None:
+                logger.info("lBIS API doesn't support HEAD on /api/marco (status %s), probing with GET instead.", head_status)
+                _head_supported = False
+        return response.status, text
+
+async def build_status_embed(bot: 'lBISBot') -> discord.Embed:
+    """Builds the embed shown by /admin status."""
+    # Only ask the device for its pump state if neither a pump task nor a recently recorded
+    # state tells us already. That one probe also answers reachability, and runs while the
+    # local fields are formatted.
+    pump_task_running = bot.pump_active
+    pump_level = known_pump_state(bot, PUMP_STATE_MAX_AGE)
+    pump_probe = None
+    if bot.last_pump_time and not pump_task_running and pump_level is None:
+        pump_probe = asyncio.create_task(get_api_pump_state(bot))
+
+    # Session Info
+    settle_session_debit(bot)
+    session_time_str = format_time(bot.session_time_remaining)
+    banked_time_str = format_time(banked_time_left(bot))
+    latch_status = "Latched" if bot.latch_active else "Unlatched"
+    latch_reason_str = f" ({bot.latch_reason})" if bot.latch_reason else ""
+    latch_status += latch_reason_str
+    pump_status = "Unknown"
+
+    if pump_probe is not None:
+        pump_is_on = await pump_probe
+        api_status = "Reachable" if pump_is_on is not None else "Unreachable"
+    else:
+        pump_is_on = pump_level > 0.0 if pump_level is not None else None
+        # Usually answered by the monitor's latest successful probe
+        marco = await cached_api(bot, "marco", ttl=MARCO_CACHE_TTL)
+        api_status = "Reachable" if marco is not None else "Unreachable"
+
+    if bot.last_pump_time:
+        # Check if a pump task is running
+        if pump_task_running:
+            pump_status = "ON (Timed/Banked)"
+        else:
+            # Use the device's actual pump state if no task is running
+            if pump_is_on is not None:
+                pump_status = "ON" if pump_is_on else "OFF"
+            else:
+                pump_status = "OFF (API check failed)"
+    else:
+        pump_status = "OFF (Never run)"
+
+    embed = discord.Embed(title="lBIS Status", color=discord.Color.blue())
+    embed.add_field(name="API Service", value=api_status, inline=False)
+    embed.add_field(name="Session Time", value=session_time_str, inline=True)
+    embed.add_field(name="Banked Time", value=banked_time_str, inline=True)
+    embed.add_field(name="Latch", value=latch_status, inline=True)
+    embed.add_field(name="Pump", value=pump_status, inline=True)
+    return embed
@@ -1,16 +1,19 @@
+import functools
+
 # --- Time Formatting ---
 
+@functools.lru_cache(maxsize=512)  # The same few values are formatted over and over (status, replies)
 def format_time(seconds: int) -> str:
     """Formats seconds into a human-readable string (e.g., 1h 5m 30s)."""
     if seconds < 0:
         seconds = 0  # Or handle negative display if needed
-    m, s = divmod(seconds, 60)
-    h, m = divmod(m, 60)
-    parts = []
+    h, rem = divmod(seconds, 3600)
+    m, s = divmod(rem, 60)
+    # Zero fields are left out; seconds are shown if they're non-zero or nothing else is
     if h > 0:
-        parts.append(f"{h}h")
+        if m > 0:
+            return f"{h}h {m}m {s}s" if s > 0 else f"{h}h {m}m"
+        return f"{h}h {s}s" if s > 0 else f"{h}h"
     if m > 0:
-        parts.append(f"{m}m")
-    if s > 0 or not parts:  # Show seconds if it's non-zero or if hours/minutes are zero
-        parts.append(f"{s}s")
-    return " ".join(parts) if parts else "0s"
+        return f"{m}m {s}s" if s > 0 else f"{m}m"
+    return f"{s}s"